@@ -0,0 +1,186 @@
+"""Admission control for the write endpoints.
+
+Each endpoint gets an AdmissionGate that bounds how many requests it handles
+at once and refuses work it can't start within a latency target, and
+token buckets that rate-limit each voter and username. Refusals happen
+before any database work: 429 with Retry-After for a client over its rate,
+503 when the endpoint is saturated. Under a spike most requests stay fast
+instead of every request getting slow.
+
+    async with vote_gate.admit(voter_id, username):
+        ...
+"""
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional
+from fastapi import HTTPException
+from app import metrics
+import asyncio
+import math
+import os
+import time
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+# Longest a request may wait for a slot before it's shed with a 503
+ADMISSION_QUEUE_TARGET_MS = int(os.getenv("ADMISSION_QUEUE_TARGET_MS", "100"))
+# Buckets kept per endpoint, the least recently used are forgotten (and refilled)
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "100000"))
+VOTE_MAX_IN_FLIGHT = int(os.getenv("VOTE_MAX_IN_FLIGHT", "64"))
+# Per voter and per username, 0 disables the limit
+VOTE_RATE_PER_SECOND = float(os.getenv("VOTE_RATE_PER_SECOND", "2"))
+VOTE_RATE_BURST = int(os.getenv("VOTE_RATE_BURST", "5"))
+LIKE_MAX_IN_FLIGHT = int(os.getenv("LIKE_MAX_IN_FLIGHT", "32"))
+LIKE_RATE_PER_SECOND = float(os.getenv("LIKE_RATE_PER_SECOND", "1"))
+LIKE_RATE_BURST = int(os.getenv("LIKE_RATE_BURST", "5"))
+
+ADMISSION_WAIT = metrics.histogram("admission_wait_seconds", "Time admitted requests waited for a slot", ["endpoint"])
+
+class TokenBuckets:
+    """One token bucket per key, refilled at `rate` tokens a second up to `burst`"""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = ADMISSION_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> (tokens, updated at), oldest use first
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Take a token for key, returns 0 when allowed or the seconds until a token is free"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+class AdmissionGate:
+    """Bounded concurrency, a latency target and per-key rate limits for one endpoint"""
+
+    def __init__(self, endpoint: str, max_in_flight: int, rate: float, burst: int,
+                 queue_target_ms: int = ADMISSION_QUEUE_TARGET_MS, enabled: bool = ADMISSION_CONTROL):
+        self.endpoint = endpoint
+        self.enabled = enabled
+        self.max_in_flight = max_in_flight
+        self.queue_target = queue_target_ms / 1000
+        self.buckets = TokenBuckets(rate, burst)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long an admitted request holds its slot
+        self.service_time = 0.0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+
+    def check_rate(self, keys: List[str]):
+        """Raise 429 when any key is over its rate, every key is charged"""
+        wait = max((self.buckets.take(key) for key in keys), default=0.0)
+        if wait > 0:
+            self.rate_limited += 1
+            raise HTTPException(status_code=429, detail="Too many requests, slow down",
+                                headers={"Retry-After": str(math.ceil(wait))})
+
+    def expected_wait(self) -> float:
+        """Seconds a new request would queue before a slot frees up"""
+        if self.in_flight < self.max_in_flight:
+            return 0.0
+        return (len(self._waiters) // self.max_in_flight + 1) * self.service_time
+
+    def _shed(self):
+        self.overloaded += 1
+        raise HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
+
+    async def acquire(self):
+        """Take a slot, waiting up to the latency target, or raise 503"""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.expected_wait() > self.queue_target:
+            self._shed()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_target)
+        except asyncio.TimeoutError:
+            # A slot handed over just as the wait ran out is still taken
+            if not self._handed_over(waiter):
+                self._shed()
+        except BaseException:
+            if self._handed_over(waiter):
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        # release() handed its slot over, in_flight is unchanged
+        ADMISSION_WAIT.labels(self.endpoint).observe(time.perf_counter() - started)
+
+    @staticmethod
+    def _handed_over(waiter: asyncio.Future) -> bool:
+        return waiter.done() and not waiter.cancelled()
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, *keys: Optional[str]):
+        """Hold a slot for the block, raising 429 or 503 instead of admitting"""
+        if not self.enabled:
+            yield
+            return
+        self.check_rate([key for key in keys if key])
+        await self.acquire()
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.service_time = elapsed if not self.service_time else 0.8 * self.service_time + 0.2 * elapsed
+            self.release()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waiting": len(self._waiters),
+            "service_time_ms": round(self.service_time * 1000, 3),
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "overloaded": self.overloaded,
+            "rate_limit_keys": len(self.buckets)
+        }
+
+vote_gate = AdmissionGate("vote", VOTE_MAX_IN_FLIGHT, VOTE_RATE_PER_SECOND, VOTE_RATE_BURST)
+like_gate = AdmissionGate("like", LIKE_MAX_IN_FLIGHT, LIKE_RATE_PER_SECOND, LIKE_RATE_BURST)
+gates = [vote_gate, like_gate]
+
+def admission_stats() -> Dict[str, dict]:
+    return {gate.endpoint: gate.stats() for gate in gates}
+
+metrics.gauge_callback("admission_requests_total", "Requests admitted or shed by admission control", lambda: {
+    (gate.endpoint, result): getattr(gate, result)
+    for gate in gates for result in ("admitted", "rate_limited", "overloaded")
+}, ["endpoint", "result"], kind="counter")
+metrics.gauge_callback("admission_in_flight", "Requests holding an admission slot",
+                       lambda: {(gate.endpoint,): gate.in_flight for gate in gates}, ["endpoint"])
+metrics.gauge_callback("admission_waiting", "Requests waiting for an admission slot",
+                       lambda: {(gate.endpoint,): len(gate._waiters) for gate in gates}, ["endpoint"])
@@ -0,0 +1,36 @@
+"""Async variants of the crud functions.
+
+Each variant runs the sync function through the session's run_sync, so the
+same query code serves both sync routes and async routes without blocking
+the event loop.
+"""
+from app import crud
+
+def _async_variant(fn):
+    async def variant(db, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    variant.__name__ = fn.__name__
+    variant.__doc__ = fn.__doc__
+    return variant
+
+create_poll = _async_variant(crud.create_poll)
+get_polls = _async_variant(crud.get_polls)
+get_poll = _async_variant(crud.get_poll)
+get_vote_stats = _async_variant(crud.get_vote_stats)
+get_versioned_vote_stats = _async_variant(crud.get_versioned_vote_stats)
+get_vote_stats_bulk = _async_variant(crud.get_vote_stats_bulk)
+get_poll_tallies = _async_variant(crud.get_poll_tallies)
+create_vote = _async_variant(crud.create_vote)
+record_vote = _async_variant(crud.record_vote)
+apply_vote_batch = _async_variant(crud.apply_vote_batch)
+delete_poll = _async_variant(crud.delete_poll)
+reset_poll_votes = _async_variant(crud.reset_poll_votes)
+poll_to_response = _async_variant(crud.poll_to_response)
+list_poll_responses = _async_variant(crud.list_poll_responses)
+create_user_like = _async_variant(crud.create_user_like)
+get_user_likes_count = _async_variant(crud.get_user_likes_count)
+get_poll_voters = _async_variant(crud.get_poll_voters)
+get_voter_changes = _async_variant(crud.get_voter_changes)
+get_user_likes_given = _async_variant(crud.get_user_likes_given)
+delete_user_like = _async_variant(crud.delete_user_like)
+get_user_profile = _async_variant(crud.get_user_profile)
@@ -0,0 +1,300 @@
+"""Pub/sub backplanes that carry WebSocket events between workers and hosts.
+
+Every ConnectionManager delivers its own events to its own sockets and hands
+them to a backplane, which forwards them to every other manager. Events are
+batched per publish window, events with the same coalescing key inside a
+batch are merged, and each event carries an id so redelivered events are
+dropped.
+
+RedisBackplane speaks the Redis PUBLISH/SUBSCRIBE protocol, so it works
+against Redis or against the local stand-in started with
+`python -m app.cli serve-backplane`.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+# "memory" keeps events in this process, "redis" shares them over a Redis-compatible server
+BACKPLANE = os.getenv("WS_BACKPLANE", "memory")
+BACKPLANE_URL = os.getenv("WS_BACKPLANE_URL", "redis://127.0.0.1:6379")
+BACKPLANE_CHANNEL = os.getenv("WS_BACKPLANE_CHANNEL", "polls:events")
+BACKPLANE_BATCH_MS = int(os.getenv("WS_BACKPLANE_BATCH_MS", "5"))
+
+logger = logging.getLogger(__name__)
+
+# Called with (topics, message, key) for every event published by another node
+EventHandler = Callable[[List[str], str, Optional[str]], None]
+
+class Backplane(ABC):
+    """Forwards published events to the other nodes"""
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex[:12]
+        self.handler: Optional[EventHandler] = None
+
+    async def start(self, handler: EventHandler):
+        self.handler = handler
+
+    async def stop(self):
+        self.handler = None
+
+    @abstractmethod
+    def publish(self, topics: List[str], message: str, key: Optional[str] = None):
+        """Forward an event to the other nodes without waiting"""
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "node_id": self.node_id}
+
+class InProcessBackplane(Backplane):
+    """Connects managers living in the same process"""
+
+    _nodes: Set["InProcessBackplane"] = set()
+
+    async def start(self, handler: EventHandler):
+        await super().start(handler)
+        self._nodes.add(self)
+
+    async def stop(self):
+        self._nodes.discard(self)
+        await super().stop()
+
+    def publish(self, topics: List[str], message: str, key: Optional[str] = None):
+        for node in self._nodes:
+            if node is not self and node.handler is not None:
+                node.handler(topics, message, key)
+
+class RedisBackplane(Backplane):
+    """Shares events between processes and hosts over Redis-compatible pub/sub"""
+
+    def __init__(self, url: str = BACKPLANE_URL, channel: str = BACKPLANE_CHANNEL,
+                 batch_ms: int = BACKPLANE_BATCH_MS, seen_size: int = 10000):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.channel = channel
+        self.batch_window = batch_ms / 1000
+        self.seen_size = seen_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._outbox: List[Tuple[str, List[str], str, Optional[str]]] = []
+        # Set from the first publish of a batch until its flush has had its reply
+        self._flush_scheduled = False
+        # One flush at a time, they share the connection
+        self._flush_lock = asyncio.Lock()
+        self._counter = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._tasks: List[asyncio.Task] = []
+        self.published_batches = 0
+        self.published_events = 0
+        self.received_events = 0
+        self.duplicates = 0
+
+    async def start(self, handler: EventHandler):
+        await super().start(handler)
+        self._tasks.append(asyncio.create_task(self._subscribe_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        await super().stop()
+
+    def publish(self, topics: List[str], message: str, key: Optional[str] = None):
+        self._counter += 1
+        self._outbox.append((f"{self.node_id}:{self._counter}", topics, message, key))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_later(self.batch_window, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._tasks.append(asyncio.create_task(self._flush()))
+
+    async def _flush(self):
+        self._tasks = [task for task in self._tasks if not task.done()]
+        try:
+            async with self._flush_lock:
+                await self._send_batch()
+        finally:
+            self._flush_scheduled = False
+            # Events published while the batch was on the wire go out in the next window
+            if self._outbox:
+                self._flush_scheduled = True
+                asyncio.get_running_loop().call_later(self.batch_window, self._schedule_flush)
+
+    async def _send_batch(self):
+        events, self._outbox = self._outbox, []
+        if not events:
+            return
+
+        # Within one batch only the latest event per coalescing key matters
+        latest: Dict[str, int] = {}
+        for index, (_, _, _, key) in enumerate(events):
+            if key is not None:
+                latest[key] = index
+        events = [
+            event for index, event in enumerate(events)
+            if event[3] is None or latest[event[3]] == index
+        ]
+
+        payload = json.dumps({"node": self.node_id, "events": events})
+        try:
+            if self._writer is None:
+                self._reader, self._writer = await self._open()
+            await send_command(self._writer, "PUBLISH", self.channel, payload)
+            await read_reply(self._reader)
+            self.published_batches += 1
+            self.published_events += len(events)
+        except (OSError, ConnectionError, RuntimeError, asyncio.IncompleteReadError) as e:
+            logger.warning("backplane publish failed, dropping events", extra={"events": len(events), "error": str(e)})
+            if self._writer is not None:
+                self._writer.close()
+            self._reader = self._writer = None
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await send_command(writer, "AUTH", self.password)
+            await read_reply(reader)
+        return reader, writer
+
+    async def _subscribe_loop(self):
+        delay = 0.5
+        while True:
+            try:
+                reader, writer = await self._open()
+                await send_command(writer, "SUBSCRIBE", self.channel)
+                delay = 0.5
+                while True:
+                    reply = await read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        self._receive(reply[2])
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.warning("backplane subscription lost", extra={"retry_in": delay, "error": str(e)})
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10)
+
+    def _receive(self, payload: bytes):
+        batch = json.loads(payload)
+        if batch["node"] == self.node_id:
+            return
+        for event_id, topics, message, key in batch["events"]:
+            if event_id in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen[event_id] = None
+            if len(self._seen) > self.seen_size:
+                self._seen.popitem(last=False)
+            self.received_events += 1
+            if self.handler is not None:
+                self.handler(topics, message, key)
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "published_batches": self.published_batches,
+            "published_events": self.published_events,
+            "received_events": self.received_events,
+            "duplicates": self.duplicates
+        }
+
+def create_backplane(kind: str = BACKPLANE) -> Backplane:
+    """Build the backplane selected by WS_BACKPLANE"""
+    if kind == "redis":
+        return RedisBackplane()
+    if kind == "memory":
+        return InProcessBackplane()
+    raise ValueError(f"Unknown backplane: {kind}")
+
+# RESP encoding, just enough for AUTH/PUBLISH/SUBSCRIBE/PING
+
+async def send_command(writer: asyncio.StreamWriter, *args: str):
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg.encode() if isinstance(arg, str) else arg
+        parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    writer.write(b"".join(parts))
+    await writer.drain()
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body
+    if kind == b"-":
+        raise ConnectionError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        return [await read_reply(reader) for _ in range(int(body))]
+    raise ConnectionError(f"Unexpected reply: {line!r}")
+
+def encode_reply(value) -> bytes:
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, bytes):
+        return f"${len(value)}\r\n".encode() + value + b"\r\n"
+    if isinstance(value, list):
+        return f"*{len(value)}\r\n".encode() + b"".join(encode_reply(item) for item in value)
+    raise TypeError(value)
+
+async def serve_hub(host: str = "127.0.0.1", port: int = 6379):
+    """Minimal Redis-compatible pub/sub server for running several workers on one host"""
+    channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscribed: Set[bytes] = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    break
+                name = command[0].upper()
+                if name == b"SUBSCRIBE":
+                    for channel in command[1:]:
+                        channels.setdefault(channel, set()).add(writer)
+                        subscribed.add(channel)
+                        writer.write(encode_reply([b"subscribe", channel, len(subscribed)]))
+                elif name == b"PUBLISH":
+                    _, channel, payload = command
+                    subscribers = channels.get(channel, set())
+                    frame = encode_reply([b"message", channel, payload])
+                    for subscriber in subscribers:
+                        subscriber.write(frame)
+                    writer.write(encode_reply(len(subscribers)))
+                elif name == b"PING":
+                    writer.write(b"+PONG\r\n")
+                elif name == b"AUTH":
+                    writer.write(b"+OK\r\n")
+                else:
+                    writer.write(f"-ERR unknown command '{name.decode()}'\r\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in subscribed:
+                channels.get(channel, set()).discard(writer)
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("backplane hub listening", extra={"host": host, "port": port})
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+from app.schemas import VoteStats
+from app import metrics
+import os
+import secrets
+import sys
+import threading
+import time
+
+# Memory cap for cached tallies
+TALLY_CACHE_MAX_BYTES = int(os.getenv("TALLY_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+# Longest a cached tally or poll response is served without rereading the database.
+# Workers that share no backplane, and CLI commands, change rows without telling this process.
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "5"))
+# Memory cap for serialized poll responses
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Approximate cost of one entry: key, version, the four counts, expiry and dict overhead
+_ENTRY_SIZE = sys.getsizeof((0, 0, 0, 0, 0, 0.0)) + 6 * sys.getsizeof(2 ** 20) + sys.getsizeof(0.0) + 100
+
+class TallyCache:
+    """In-memory LRU cache of vote tallies keyed by poll_id"""
+
+    def __init__(self, max_bytes: int = TALLY_CACHE_MAX_BYTES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max(max_bytes // _ENTRY_SIZE, 1)
+        # 0 keeps entries until they are replaced, invalidated or evicted
+        self.ttl = ttl
+        # poll_id -> (version, option1, option2, option3, option4, expires at)
+        self._entries: "OrderedDict[int, Tuple[int, int, int, int, int, float]]" = OrderedDict()
+        # Sync routes run in a thread pool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, poll_id: int) -> Optional[VoteStats]:
+        """Get the cached tally for a poll"""
+        entry = self.get_entry(poll_id)
+        if entry is None:
+            return None
+        _, option1, option2, option3, option4 = entry
+        return VoteStats(option1=option1, option2=option2, option3=option3, option4=option4)
+
+    def get_entry(self, poll_id: int) -> Optional[Tuple[int, int, int, int, int]]:
+        """Get the cached (version, option1, option2, option3, option4) for a poll"""
+        with self._lock:
+            entry = self._entries.get(poll_id)
+            if entry is not None and self.ttl and entry[5] <= time.monotonic():
+                del self._entries[poll_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(poll_id)
+            self.hits += 1
+        return entry[:5]
+
+    def set(self, poll_id: int, stats: VoteStats, version: int):
+        """Store a tally, ignoring it if a newer version is already cached"""
+        with self._lock:
+            entry = self._entries.get(poll_id)
+            if entry is not None and entry[0] > version:
+                return
+            expires = time.monotonic() + self.ttl
+            self._entries[poll_id] = (version, stats.option1, stats.option2, stats.option3, stats.option4, expires)
+            self._entries.move_to_end(poll_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, poll_id: int):
+        """Drop a poll's cached tally"""
+        with self._lock:
+            self._entries.pop(poll_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries
+        }
+
+class PollVersions:
+    """Change counters for each poll and for the poll list, the validators behind poll ETags"""
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS):
+        # Counters restart with the process, the epoch keeps ETags from different processes apart
+        self.epoch = secrets.token_hex(4)
+        # ETags also change every ttl seconds, so changes this process never heard of show up
+        self.ttl = ttl
+        self._polls: Dict[int, int] = {}
+        self.list_version = 0
+        self._lock = threading.Lock()
+
+    def bump(self, poll_id: int):
+        """Record a committed change to a poll, which also changes the poll list"""
+        with self._lock:
+            self._polls[poll_id] = self._polls.get(poll_id, 0) + 1
+            self.list_version += 1
+
+    def window(self) -> int:
+        """The current ttl period, 0 when versions don't expire"""
+        return int(time.monotonic() // self.ttl) if self.ttl else 0
+
+    def poll_etag(self, poll_id: int) -> str:
+        return f'"poll-{poll_id}-{self.epoch}-{self.window()}-{self._polls.get(poll_id, 0)}"'
+
+    def list_etag(self) -> str:
+        return f'"polls-{self.epoch}-{self.window()}-{self.list_version}"'
+
+class ResponseCache:
+    """LRU cache of serialized response bodies, each valid for one ETag and so for one PollVersions window"""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, etag: str) -> Optional[bytes]:
+        """The cached body for a key if it was stored under the current ETag"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, etag: str, body: bytes):
+        """Store a body, replacing the key's body for any older ETag"""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous[1])
+            self._entries[key] = (etag, body)
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes
+        }
+
+tally_cache = TallyCache()
+poll_versions = PollVersions()
+response_cache = ResponseCache()
+
+metrics.gauge_callback("tally_cache_lookups_total", "Tally cache lookups by result", lambda: {
+    ("hit",): tally_cache.hits, ("miss",): tally_cache.misses
+}, ["result"], kind="counter")
+metrics.gauge_callback("tally_cache_hit_ratio", "Share of tally lookups served from the cache", lambda: tally_cache.stats()["hit_ratio"])
+metrics.gauge_callback("tally_cache_entries", "Tallies held by the cache", lambda: len(tally_cache._entries))
+metrics.gauge_callback("tally_cache_evictions_total", "Tallies evicted to stay under the memory cap", lambda: tally_cache.evictions, kind="counter")
+metrics.gauge_callback("response_cache_lookups_total", "Serialized poll response lookups by result", lambda: {
+    ("hit",): response_cache.hits, ("miss",): response_cache.misses
+}, ["result"], kind="counter")
+metrics.gauge_callback("response_cache_bytes", "Bytes of serialized poll responses held", lambda: response_cache.bytes)
+metrics.gauge_callback("response_cache_evictions_total", "Responses evicted to stay under the memory cap", lambda: response_cache.evictions, kind="counter")
@@ -0,0 +1,73 @@
+"""Maintenance commands, run with `python -m app.cli <command>`"""
+import argparse
+import asyncio
+from sqlmodel import Session
+from app.database import engine, create_db_and_tables
+from app.crud import reconcile_poll_tallies, reconcile_user_stats, prune_voter_changes
+from app.migrations import migrate
+from app.backplane import serve_hub
+from app.log import configure_logging
+
+def reconcile_tallies(args):
+    """Check PollTally rows against Vote rows and rebuild the ones that drifted"""
+    with Session(engine) as db:
+        mismatched = reconcile_poll_tallies(db, fix=not args.dry_run)
+    action = "found" if args.dry_run else "rebuilt"
+    print(f"{action} {len(mismatched)} mismatched tallies: {mismatched}")
+
+def rebuild_user_stats(args):
+    """Recount every user's likes, polls and votes and fix the stats rows that drifted"""
+    with Session(engine) as db:
+        mismatched = reconcile_user_stats(db, fix=not args.dry_run)
+    action = "found" if args.dry_run else "rebuilt"
+    print(f"{action} {len(mismatched)} mismatched user stats: {mismatched}")
+
+def prune_changes(args):
+    """Trim the voter change log, clients further behind refetch the full list"""
+    with Session(engine) as db:
+        removed = prune_voter_changes(db, keep=args.keep)
+    print(f"removed {removed} voter changes")
+
+def migrate_database(args):
+    """Apply schema changes to an existing database"""
+    print(migrate(engine))
+
+def serve_backplane(args):
+    """Run the local Redis-compatible pub/sub hub for multi-worker fan-out"""
+    try:
+        asyncio.run(serve_hub(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Polling API maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser("reconcile-tallies", help="Rebuild vote tallies from Vote rows")
+    reconcile.add_argument("--dry-run", action="store_true", help="Only report mismatched tallies")
+    reconcile.set_defaults(func=reconcile_tallies)
+
+    user_stats = commands.add_parser("rebuild-user-stats", help="Recount user profile stats from Poll, Vote and UserLike rows")
+    user_stats.add_argument("--dry-run", action="store_true", help="Only report mismatched users")
+    user_stats.set_defaults(func=rebuild_user_stats)
+
+    prune = commands.add_parser("prune-voter-changes", help="Keep only the latest voter changes per poll")
+    prune.add_argument("--keep", type=int, default=1000, help="Changes to keep per poll")
+    prune.set_defaults(func=prune_changes)
+
+    migrate_command = commands.add_parser("migrate", help="Add missing columns and indexes, dedupe votes, build tallies and user stats")
+    migrate_command.set_defaults(func=migrate_database)
+
+    hub = commands.add_parser("serve-backplane", help="Run a local pub/sub hub for WS_BACKPLANE=redis")
+    hub.add_argument("--host", default="127.0.0.1")
+    hub.add_argument("--port", type=int, default=6379)
+    hub.set_defaults(func=serve_backplane)
+
+    args = parser.parse_args()
+    configure_logging()
+    if args.func not in (migrate_database, serve_backplane):
+        create_db_and_tables()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
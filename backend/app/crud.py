@@ -1,8 +1,12 @@
-from sqlmodel import Session, select
-from typing import List, Optional
-from app.models import Poll, Vote, UserLike
-from app.schemas import PollCreate, VoteCreate, UserLikeCreate, VoteStats, PollResponse
+from sqlmodel import Session, select, func, or_, and_, delete, update
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import sqlite, postgresql
+from typing import Dict, List, Optional, Tuple
+from app.models import Poll, Vote, UserLike, PollTally, VoterChange, UserStats
+from app.cache import tally_cache, poll_versions
+from app.schemas import PollCreate, VoteCreate, UserLikeCreate, VoteStats, PollResponse, PollListResponse, VoterChangeInfo
 from datetime import datetime
+import base64
 
 def create_poll(db: Session, poll: PollCreate) -> Poll:
     """Create a new poll"""
@@ -16,80 +20,424 @@ def create_poll(db: Session, poll: PollCreate) -> Poll:
         creator_username=poll.creator_username
     )
     db.add(db_poll)
+    db.flush()
+    poll_id = db_poll.id
+    db.add(PollTally(poll_id=poll_id))
+    update_user_stats(db, {poll.creator_username: {"polls_created": 1}})
     db.commit()
+    poll_versions.bump(poll_id)
     db.refresh(db_poll)
     return db_poll
 
 def get_polls(db: Session, skip: int = 0, limit: int = 100) -> List[Poll]:
     """Get all polls with pagination"""
-    statement = select(Poll).offset(skip).limit(limit).order_by(Poll.created_at.desc())
+    statement = select(Poll).offset(skip).limit(limit).order_by(Poll.created_at.desc(), Poll.id.desc())
+    return db.exec(statement).all()
+
+def encode_cursor(poll: Poll) -> str:
+    """Encode a poll's position in the listing as an opaque cursor"""
+    raw = f"{poll.created_at.isoformat()}|{poll.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a listing cursor, raises ValueError if it is malformed"""
+    try:
+        created_at, poll_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(poll_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def get_polls_after(db: Session, cursor: Optional[str], limit: int = 100) -> List[Poll]:
+    """Get polls older than the cursor, newest first (keyset pagination)"""
+    statement = select(Poll)
+    if cursor:
+        created_at, poll_id = decode_cursor(cursor)
+        statement = statement.where(or_(
+            Poll.created_at < created_at,
+            and_(Poll.created_at == created_at, Poll.id < poll_id)
+        ))
+    statement = statement.order_by(Poll.created_at.desc(), Poll.id.desc()).limit(limit)
     return db.exec(statement).all()
 
 def get_poll(db: Session, poll_id: int) -> Optional[Poll]:
     """Get a specific poll by ID"""
     return db.get(Poll, poll_id)
 
-def get_vote_stats(db: Session, poll_id: int) -> VoteStats:
-    """Get vote statistics for a poll"""
-    votes = db.exec(select(Vote).where(Vote.poll_id == poll_id)).all()
+def count_votes(db: Session, poll_id: int) -> VoteStats:
+    """Count votes for a poll straight from the Vote table"""
+    rows = db.exec(
+        select(Vote.option, func.count()).where(Vote.poll_id == poll_id).group_by(Vote.option)
+    ).all()
     
     stats = VoteStats()
-    for vote in votes:
-        if vote.option == 1:
-            stats.option1 += 1
-        elif vote.option == 2:
-            stats.option2 += 1
-        elif vote.option == 3:
-            stats.option3 += 1
-        elif vote.option == 4:
-            stats.option4 += 1
+    for option, count in rows:
+        if 1 <= option <= 4:
+            setattr(stats, f"option{option}", count)
+    
+    return stats
+
+def tally_to_stats(tally: PollTally) -> VoteStats:
+    """Convert PollTally model to VoteStats"""
+    return VoteStats(
+        option1=tally.option1,
+        option2=tally.option2,
+        option3=tally.option3,
+        option4=tally.option4
+    )
+
+def get_vote_stats(db: Session, poll_id: int) -> VoteStats:
+    """Get vote statistics for a poll"""
+    return get_versioned_vote_stats(db, poll_id)[1]
+
+def get_versioned_vote_stats(db: Session, poll_id: int) -> Tuple[Optional[int], VoteStats]:
+    """Get the tally version and vote statistics for a poll, the version is None without a tally row"""
+    entry = tally_cache.get_entry(poll_id)
+    if entry is not None:
+        version, option1, option2, option3, option4 = entry
+        return version, VoteStats(option1=option1, option2=option2, option3=option3, option4=option4)
     
+    tally = db.get(PollTally, poll_id)
+    if tally is None:
+        # Polls created before tallies existed until they are rebuilt
+        return None, count_votes(db, poll_id)
+    return tally.version, cache_tally(tally)
+
+def cache_tally(tally: PollTally) -> VoteStats:
+    """Write a loaded tally through to the cache"""
+    stats = tally_to_stats(tally)
+    tally_cache.set(tally.poll_id, stats, tally.version)
+    return stats
+
+def commit_tally(db: Session, tally: PollTally) -> VoteStats:
+    """Commit the session, then write the tally through to the cache"""
+    # Read the values before commit expires them
+    poll_id, stats, version = tally.poll_id, tally_to_stats(tally), tally.version
+    db.commit()
+    tally_cache.set(poll_id, stats, version)
+    poll_versions.bump(poll_id)
     return stats
 
+def get_vote_stats_bulk(db: Session, poll_ids: List[int]) -> Dict[int, VoteStats]:
+    """Get vote statistics for many polls with at most two queries"""
+    results: Dict[int, VoteStats] = {}
+    missing = []
+    for poll_id in poll_ids:
+        cached = tally_cache.get(poll_id)
+        if cached is not None:
+            results[poll_id] = cached
+        else:
+            missing.append(poll_id)
+    
+    if missing:
+        tallies = db.exec(select(PollTally).where(PollTally.poll_id.in_(missing))).all()
+        for tally in tallies:
+            results[tally.poll_id] = cache_tally(tally)
+    
+    # Polls created before tallies existed are counted in one grouped query
+    uncounted = [poll_id for poll_id in missing if poll_id not in results]
+    if uncounted:
+        results.update(count_votes_bulk(db, uncounted))
+    
+    return results
+
+def count_votes_bulk(db: Session, poll_ids: List[int]) -> Dict[int, VoteStats]:
+    """Count the Vote rows of many polls in one grouped query"""
+    results = {poll_id: VoteStats() for poll_id in poll_ids}
+    rows = db.exec(
+        select(Vote.poll_id, Vote.option, func.count())
+        .where(Vote.poll_id.in_(poll_ids))
+        .group_by(Vote.poll_id, Vote.option)
+    ).all()
+    for poll_id, option, count in rows:
+        if 1 <= option <= 4:
+            setattr(results[poll_id], f"option{option}", count)
+    return results
+
+def get_poll_tallies(db: Session, poll_ids: List[int]) -> Dict[int, Tuple[int, int, int, int, int]]:
+    """(version, option1, option2, option3, option4) of many polls, unknown poll IDs are left out.
+
+    Cached tallies cost no query, the rest are loaded in one query. Polls
+    without a tally row are counted from their votes and reported as version 0.
+    """
+    results: Dict[int, Tuple[int, int, int, int, int]] = {}
+    missing = []
+    for poll_id in poll_ids:
+        entry = tally_cache.get_entry(poll_id)
+        if entry is not None:
+            results[poll_id] = entry
+        else:
+            missing.append(poll_id)
+    
+    if missing:
+        for tally in db.exec(select(PollTally).where(PollTally.poll_id.in_(missing))).all():
+            cache_tally(tally)
+            results[tally.poll_id] = (tally.version, tally.option1, tally.option2, tally.option3, tally.option4)
+    
+    untallied = [poll_id for poll_id in missing if poll_id not in results]
+    if untallied:
+        existing = db.exec(select(Poll.id).where(Poll.id.in_(untallied))).all()
+        if existing:
+            for poll_id, stats in count_votes_bulk(db, list(existing)).items():
+                results[poll_id] = (0, stats.option1, stats.option2, stats.option3, stats.option4)
+    
+    return results
+
+def lock_tallies(db: Session, poll_ids: List[int]):
+    """Take the write lock before tallies are read, SQLite ignores FOR UPDATE"""
+    if db.get_bind().dialect.name == "sqlite":
+        # A no-op write starts the write transaction, so concurrent votes wait instead of reading a stale tally
+        db.exec(update(PollTally).where(PollTally.poll_id.in_(poll_ids)).values(version=PollTally.version))
+
+def get_or_build_tally(db: Session, poll_id: int) -> PollTally:
+    """Get the tally row for a poll, building it from Vote rows if missing"""
+    # Row lock serializes concurrent votes on the same poll where supported
+    lock_tallies(db, [poll_id])
+    tally = db.get(PollTally, poll_id, with_for_update=True, populate_existing=True)
+    if tally is None:
+        stats = count_votes(db, poll_id)
+        tally = PollTally(poll_id=poll_id, **stats.model_dump())
+        db.add(tally)
+    return tally
+
+def apply_vote_change(tally: PollTally, old_option: Optional[int], new_option: Optional[int]):
+    """Move one vote between options on a tally row"""
+    if old_option == new_option:
+        return
+    tally.version += 1
+    if old_option is not None:
+        field = f"option{old_option}"
+        setattr(tally, field, max(getattr(tally, field) - 1, 0))
+    if new_option is not None:
+        field = f"option{new_option}"
+        setattr(tally, field, getattr(tally, field) + 1)
+
 def get_likes_count(db: Session, poll_id: int) -> int:
     """Get total likes count for a poll"""
     statement = select(Like).where(Like.poll_id == poll_id)
     likes = db.exec(statement).all()
     return len(likes)
 
-def create_vote(db: Session, poll_id: int, vote: VoteCreate, voter_ip: str) -> Optional[Vote]:
-    """Create or update a vote (allow vote switching)"""
-    # Check if user already voted on this poll
-    existing_vote = db.exec(
-        select(Vote).where(Vote.poll_id == poll_id, Vote.voter_ip == voter_ip)
-    ).first()
-    
+def count_options(poll: Poll) -> int:
+    """Number of options a poll offers"""
+    options = [poll.option1, poll.option2, poll.option3, poll.option4]
+    return len([opt for opt in options if opt])
+
+USER_STAT_FIELDS = ("likes_received", "polls_created", "total_votes")
+
+def update_user_stats(db: Session, deltas: Dict[Optional[str], Dict[str, int]]):
+    """Add counter deltas to users' stats rows in one upsert, in the caller's transaction"""
+    rows = [
+        {"username": username, **{field: changes.get(field, 0) for field in USER_STAT_FIELDS}}
+        for username, changes in deltas.items() if username and any(changes.values())
+    ]
+    if not rows:
+        return
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(UserStats).values(rows)
+    # Increments in SQL, so concurrent writers never overwrite each other's counts
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserStats.username],
+        set_={field: getattr(UserStats, field) + getattr(statement.excluded, field) for field in USER_STAT_FIELDS}
+    )
+    db.exec(statement)
+
+def vote_count_deltas(db: Session, poll_id: int) -> Dict[Optional[str], Dict[str, int]]:
+    """total_votes deltas that remove a poll's votes from their voters' stats"""
+    rows = db.exec(
+        select(Vote.voter_username, func.count())
+        .where(Vote.poll_id == poll_id, Vote.voter_username.is_not(None))
+        .group_by(Vote.voter_username)
+    ).all()
+    return {username: {"total_votes": -count} for username, count in rows}
+
+def voter_username_deltas(changes: List[Tuple[Optional[str], Optional[str]]]) -> Dict[Optional[str], Dict[str, int]]:
+    """total_votes deltas for the (previous, new) voter usernames of written votes, None for no vote or an anonymous one"""
+    deltas: Dict[Optional[str], Dict[str, int]] = {}
+    for previous, current in changes:
+        if previous == current:
+            continue
+        if previous is not None:
+            deltas.setdefault(previous, {"total_votes": 0})["total_votes"] -= 1
+        if current is not None:
+            deltas.setdefault(current, {"total_votes": 0})["total_votes"] += 1
+    return deltas
+
+def upsert_votes(db: Session, rows: List[dict]) -> Dict[Tuple[int, str], Tuple[int, datetime]]:
+    """Insert votes, switching the option of voters who already voted, in one statement.
+
+    Returns the id and original created_at of each row keyed by (poll_id, voter_ip).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(Vote).values(rows)
+    else:
+        statement = sqlite.insert(Vote).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Vote.poll_id, Vote.voter_ip],
+        set_={"option": statement.excluded.option, "voter_username": statement.excluded.voter_username}
+    ).returning(Vote.id, Vote.poll_id, Vote.voter_ip, Vote.created_at)
+    return {
+        (poll_id, voter_ip): (vote_id, created_at)
+        for vote_id, poll_id, voter_ip, created_at in db.exec(statement).all()
+    }
+
+def record_voter_change(db: Session, tally: PollTally, kind: str, vote_id: Optional[int] = None,
+                        username: Optional[str] = None, from_option: Optional[int] = None,
+                        to_option: Optional[int] = None, voted_at: Optional[datetime] = None) -> VoterChangeInfo:
+    """Log a voter list change at the tally's current version"""
+    change = VoterChangeInfo(
+        version=tally.version,
+        kind=kind,
+        vote_id=vote_id,
+        username=username,
+        from_option=from_option,
+        to_option=to_option,
+        voted_at=voted_at
+    )
+    db.add(VoterChange(poll_id=tally.poll_id, **change.model_dump()))
+    return change
+
+def record_vote(db: Session, poll_id: int, vote: VoteCreate, voter_ip: str) -> Optional[Tuple[Vote, Optional[VoterChangeInfo]]]:
+    """Create or update a vote, returns the vote and the voter list change it caused"""
     # Validate option
     poll = get_poll(db, poll_id)
     if not poll:
         return None
     
     # Check if option exists and is valid
-    options = [poll.option1, poll.option2, poll.option3, poll.option4]
-    available_options = len([opt for opt in options if opt])
-    if vote.option < 1 or vote.option > available_options:
+    if vote.option < 1 or vote.option > count_options(poll):
         return None
     
-    if existing_vote:
-        # Update existing vote (vote switching)
-        existing_vote.option = vote.option
-        existing_vote.voter_username = vote.voter_username
-        db.add(existing_vote)
-        db.commit()
-        db.refresh(existing_vote)
-        return existing_vote
-    else:
-        # Create new vote
-        db_vote = Vote(
-            poll_id=poll_id,
-            option=vote.option,
-            voter_ip=voter_ip,
-            voter_username=vote.voter_username
+    # Keep the tally in the same transaction as the vote
+    tally = get_or_build_tally(db, poll_id)
+    
+    # Check if user already voted on this poll
+    previous = db.exec(
+        select(Vote.option, Vote.voter_username).where(Vote.poll_id == poll_id, Vote.voter_ip == voter_ip)
+    ).first()
+    previous_option, previous_username = previous if previous else (None, None)
+    
+    # Insert or switch atomically, the unique (poll_id, voter_ip) index rules out duplicates
+    written = upsert_votes(db, [{
+        "poll_id": poll_id,
+        "option": vote.option,
+        "voter_ip": voter_ip,
+        "voter_username": vote.voter_username,
+        "created_at": datetime.utcnow()
+    }])
+    vote_id, created_at = written[(poll_id, voter_ip)]
+    
+    change = None
+    if previous_option != vote.option:
+        apply_vote_change(tally, previous_option, vote.option)
+        kind = "added" if previous_option is None else "moved"
+        change = record_voter_change(db, tally, kind, vote_id, vote.voter_username, previous_option, vote.option, created_at)
+    elif previous_username != vote.voter_username:
+        # Same option under another name, the voter list still changes
+        tally.version += 1
+        change = record_voter_change(db, tally, "renamed", vote_id, vote.voter_username, previous_option, vote.option, created_at)
+    update_user_stats(db, voter_username_deltas([(previous_username, vote.voter_username)]))
+    commit_tally(db, tally)
+    
+    db_vote = Vote(
+        id=vote_id,
+        poll_id=poll_id,
+        option=vote.option,
+        voter_ip=voter_ip,
+        voter_username=vote.voter_username,
+        created_at=created_at
+    )
+    return db_vote, change
+
+def create_vote(db: Session, poll_id: int, vote: VoteCreate, voter_ip: str) -> Optional[Vote]:
+    """Create or update a vote (allow vote switching)"""
+    result = record_vote(db, poll_id, vote, voter_ip)
+    return result[0] if result else None
+
+def apply_vote_batch(db: Session, votes: List[Tuple[int, str, int, Optional[str]]]) -> Tuple[Dict[int, Tuple[int, VoteStats]], Dict[int, List[VoterChangeInfo]]]:
+    """Write a batch of (poll_id, voter_ip, option, voter_username) votes in one transaction.
+
+    Options must already be validated. Later votes from the same voter win,
+    votes for polls that no longer exist are dropped. Returns the new tally
+    version and counts and the voter list changes of every poll touched.
+    """
+    latest = {}
+    for poll_id, voter_ip, option, voter_username in votes:
+        latest[(poll_id, voter_ip)] = (option, voter_username)
+    
+    poll_ids = set(db.exec(select(Poll.id).where(Poll.id.in_({key[0] for key in latest}))).all())
+    latest = {key: value for key, value in latest.items() if key[0] in poll_ids}
+    if not latest:
+        return {}, {}
+    
+    lock_tallies(db, list(poll_ids))
+    tallies = {
+        tally.poll_id: tally
+        for tally in db.exec(
+            select(PollTally).where(PollTally.poll_id.in_(poll_ids)).with_for_update()
+            .execution_options(populate_existing=True)
+        ).all()
+    }
+    existing = {
+        (vote.poll_id, vote.voter_ip): vote
+        for vote in db.exec(
+            select(Vote).where(tuple_(Vote.poll_id, Vote.voter_ip).in_(list(latest)))
+        ).all()
+    }
+    for poll_id in poll_ids - set(tallies):
+        tallies[poll_id] = get_or_build_tally(db, poll_id)
+    
+    rows = []
+    moves = []
+    usernames = []
+    now = datetime.utcnow()
+    for (poll_id, voter_ip), (option, voter_username) in latest.items():
+        existing_vote = existing.get((poll_id, voter_ip))
+        previous_option = existing_vote.option if existing_vote else None
+        if existing_vote is not None and previous_option == option and existing_vote.voter_username == voter_username:
+            continue
+        if previous_option != option:
+            apply_vote_change(tallies[poll_id], previous_option, option)
+            kind = "added" if previous_option is None else "moved"
+        else:
+            # Same option under another name, the voter list still changes
+            tallies[poll_id].version += 1
+            kind = "renamed"
+        moves.append((poll_id, voter_ip, voter_username, kind, previous_option, option, tallies[poll_id].version))
+        usernames.append((existing_vote.voter_username if existing_vote else None, voter_username))
+        rows.append({
+            "poll_id": poll_id,
+            "option": option,
+            "voter_ip": voter_ip,
+            "voter_username": voter_username,
+            "created_at": now
+        })
+    
+    # One multi-row upsert covers both new voters and switches
+    written = upsert_votes(db, rows) if rows else {}
+    update_user_stats(db, voter_username_deltas(usernames))
+    
+    changes: Dict[int, List[VoterChangeInfo]] = {}
+    for poll_id, voter_ip, voter_username, kind, previous_option, option, version in moves:
+        vote_id, created_at = written[(poll_id, voter_ip)]
+        change = VoterChangeInfo(
+            version=version,
+            kind=kind,
+            vote_id=vote_id,
+            username=voter_username,
+            from_option=previous_option,
+            to_option=option,
+            voted_at=created_at
         )
-        db.add(db_vote)
-        db.commit()
-        db.refresh(db_vote)
-        return db_vote
+        db.add(VoterChange(poll_id=poll_id, **change.model_dump()))
+        changes.setdefault(poll_id, []).append(change)
+    
+    pending = {poll_id: (tally_to_stats(tally), tally.version) for poll_id, tally in tallies.items()}
+    db.commit()
+    for poll_id, (stats, version) in pending.items():
+        tally_cache.set(poll_id, stats, version)
+        poll_versions.bump(poll_id)
+    return {poll_id: (version, stats) for poll_id, (stats, version) in pending.items()}, changes
 
 def delete_poll(db: Session, poll_id: int) -> bool:
     """Delete a poll and all its associated votes"""
@@ -97,19 +445,119 @@ def delete_poll(db: Session, poll_id: int) -> bool:
     if not poll:
         return False
     
+    deltas = vote_count_deltas(db, poll_id)
+    if poll.creator_username:
+        deltas.setdefault(poll.creator_username, {})["polls_created"] = -1
+    update_user_stats(db, deltas)
+    
     # Delete all votes for this poll
-    votes = db.exec(select(Vote).where(Vote.poll_id == poll_id)).all()
-    for vote in votes:
-        db.delete(vote)
+    db.exec(delete(Vote).where(Vote.poll_id == poll_id))
+    db.exec(delete(VoterChange).where(VoterChange.poll_id == poll_id))
+    db.exec(delete(PollTally).where(PollTally.poll_id == poll_id))
     
     # Delete the poll
     db.delete(poll)
     db.commit()
+    tally_cache.invalidate(poll_id)
+    poll_versions.bump(poll_id)
     return True
 
-def poll_to_response(db: Session, poll: Poll) -> PollResponse:
+def reset_poll_votes(db: Session, poll_id: int) -> Tuple[VoteStats, VoterChangeInfo]:
+    """Delete all votes for a poll and zero its tally, returns the tally and the reset change"""
+    update_user_stats(db, vote_count_deltas(db, poll_id))
+    db.exec(delete(Vote).where(Vote.poll_id == poll_id))
+    # Earlier changes are superseded by the reset
+    db.exec(delete(VoterChange).where(VoterChange.poll_id == poll_id))
+    
+    tally = get_or_build_tally(db, poll_id)
+    tally.option1 = tally.option2 = tally.option3 = tally.option4 = 0
+    tally.version += 1
+    change = record_voter_change(db, tally, "reset")
+    return commit_tally(db, tally), change
+
+def rebuild_poll_tally(db: Session, poll_id: int) -> VoteStats:
+    """Recount a poll's tally from its Vote rows"""
+    stats = count_votes(db, poll_id)
+    tally = db.get(PollTally, poll_id)
+    if tally is None:
+        tally = PollTally(poll_id=poll_id)
+    for option, count in stats.model_dump().items():
+        setattr(tally, option, count)
+    tally.version += 1
+    db.add(tally)
+    # Clients can't replay a rebuild, they refetch the full list
+    record_voter_change(db, tally, "resync")
+    return commit_tally(db, tally)
+
+def reconcile_poll_tallies(db: Session, fix: bool = True) -> List[int]:
+    """Compare every poll's tally against its Vote rows, returns the poll IDs that differed"""
+    mismatched = []
+    for poll_id in db.exec(select(Poll.id)).all():
+        tally = db.get(PollTally, poll_id)
+        stats = count_votes(db, poll_id)
+        if tally is None or tally_to_stats(tally) != stats:
+            mismatched.append(poll_id)
+            if fix:
+                rebuild_poll_tally(db, poll_id)
+    return mismatched
+
+def backfill_poll_tallies(db: Session) -> List[int]:
+    """Build tallies for polls that have no PollTally row, returns their IDs"""
+    missing = db.exec(select(Poll.id).where(Poll.id.not_in(select(PollTally.poll_id)))).all()
+    for poll_id in missing:
+        rebuild_poll_tally(db, poll_id)
+    return list(missing)
+
+def count_user_stats(db: Session) -> Dict[str, Dict[str, int]]:
+    """Every user's counters recounted from the Poll, Vote and UserLike rows"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for field, column in (
+        ("polls_created", Poll.creator_username),
+        ("total_votes", Vote.voter_username),
+        ("likes_received", UserLike.liked_username)
+    ):
+        rows = db.exec(select(column, func.count()).where(column.is_not(None)).group_by(column)).all()
+        for username, count in rows:
+            counts.setdefault(username, dict.fromkeys(USER_STAT_FIELDS, 0))[field] = count
+    return counts
+
+def reconcile_user_stats(db: Session, fix: bool = True) -> List[str]:
+    """Compare every user's stats row against a recount, returns the usernames that differed"""
+    expected = count_user_stats(db)
+    zero = dict.fromkeys(USER_STAT_FIELDS, 0)
+    rows = {stats.username: stats for stats in db.exec(select(UserStats)).all()}
+    mismatched = []
+    for username in sorted(expected.keys() | rows.keys()):
+        counts = expected.get(username, zero)
+        stats = rows.get(username)
+        if stats is not None and all(getattr(stats, field) == counts[field] for field in USER_STAT_FIELDS):
+            continue
+        mismatched.append(username)
+        if fix:
+            if stats is None:
+                stats = UserStats(username=username)
+            for field in USER_STAT_FIELDS:
+                setattr(stats, field, counts[field])
+            db.add(stats)
+    if fix and mismatched:
+        db.commit()
+    return mismatched
+
+def prune_voter_changes(db: Session, keep: int = 1000) -> int:
+    """Drop all but the latest `keep` voter changes per poll, returns the number removed"""
+    latest = (
+        select(PollTally.version)
+        .where(PollTally.poll_id == VoterChange.poll_id)
+        .scalar_subquery()
+    )
+    result = db.exec(delete(VoterChange).where(VoterChange.version <= latest - keep))
+    db.commit()
+    return result.rowcount
+
+def poll_to_response(db: Session, poll: Poll, votes: Optional[VoteStats] = None) -> PollResponse:
     """Convert Poll model to PollResponse"""
-    votes = get_vote_stats(db, poll.id)
+    if votes is None:
+        votes = get_vote_stats(db, poll.id)
     
     return PollResponse(
         id=poll.id,
@@ -125,6 +573,21 @@ def poll_to_response(db: Session, poll: Poll) -> PollResponse:
         updated_at=poll.updated_at
     )
 
+def list_poll_responses(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> PollListResponse:
+    """Get a page of polls with their tallies fetched in bulk"""
+    if cursor is not None:
+        polls = get_polls_after(db, cursor, limit)
+    else:
+        polls = get_polls(db, skip=skip, limit=limit)
+    
+    stats = get_vote_stats_bulk(db, [poll.id for poll in polls])
+    next_cursor = encode_cursor(polls[-1]) if len(polls) == limit else None
+    
+    return PollListResponse(
+        polls=[poll_to_response(db, poll, stats[poll.id]) for poll in polls],
+        next_cursor=next_cursor
+    )
+
 def create_user_like(db: Session, user_like: UserLikeCreate) -> Optional[UserLike]:
     """Create a user like (user likes another user)"""
     # Check if user already liked this user
@@ -147,19 +610,24 @@ def create_user_like(db: Session, user_like: UserLikeCreate) -> Optional[UserLik
         liked_username=user_like.liked_username
     )
     db.add(db_like)
+    update_user_stats(db, {user_like.liked_username: {"likes_received": 1}})
     db.commit()
     db.refresh(db_like)
     return db_like
 
 def get_user_likes_count(db: Session, username: str) -> int:
     """Get total likes received by a user"""
-    statement = select(UserLike).where(UserLike.liked_username == username)
-    likes = db.exec(statement).all()
-    return len(likes)
+    stats = db.get(UserStats, username)
+    return stats.likes_received if stats else 0
 
 def get_poll_voters(db: Session, poll_id: int) -> dict:
     """Get all voters for a poll grouped by option"""
-    votes = db.exec(select(Vote).where(Vote.poll_id == poll_id)).all()
+    # Read the version first, replaying changes the list already includes is harmless
+    tally = db.get(PollTally, poll_id)
+    version = tally.version if tally else 0
+    votes = db.exec(
+        select(Vote.id, Vote.option, Vote.voter_username, Vote.created_at).where(Vote.poll_id == poll_id)
+    ).all()
     
     option1_voters = []
     option2_voters = []
@@ -168,6 +636,7 @@ def get_poll_voters(db: Session, poll_id: int) -> dict:
     
     for vote in votes:
         voter_info = {
+            "id": vote.id,
             "username": vote.voter_username,
             "voted_at": vote.created_at
         }
@@ -183,12 +652,100 @@ def get_poll_voters(db: Session, poll_id: int) -> dict:
     
     return {
         "poll_id": poll_id,
+        "version": version,
         "option1_voters": option1_voters,
         "option2_voters": option2_voters,
         "option3_voters": option3_voters,
         "option4_voters": option4_voters
     }
 
+MAX_VOTERS_PAGE = 1000
+
+def encode_voter_cursor(option: int, vote_id: int) -> str:
+    """Encode a position in one option's voter list as an opaque cursor"""
+    return base64.urlsafe_b64encode(f"{option}|{vote_id}".encode()).decode()
+
+def decode_voter_cursor(cursor: str, option: int) -> int:
+    """Decode a voter cursor for an option, raises ValueError if it is malformed or for another option"""
+    try:
+        cursor_option, vote_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if int(cursor_option) != option:
+            raise ValueError("Cursor belongs to another option")
+        return int(vote_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def get_option_voters(db: Session, poll_id: int, option: int, cursor: Optional[str] = None,
+                      limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+    """Get one page of an option's voters in vote order (keyset pagination), plus the next cursor"""
+    limit = max(1, min(limit, MAX_VOTERS_PAGE))
+    statement = select(Vote.id, Vote.voter_username, Vote.created_at).where(
+        Vote.poll_id == poll_id, Vote.option == option
+    )
+    if cursor:
+        statement = statement.where(Vote.id > decode_voter_cursor(cursor, option))
+    # One extra row tells whether another page exists
+    rows = db.exec(statement.order_by(Vote.id).limit(limit + 1)).all()
+    next_cursor = encode_voter_cursor(option, rows[limit - 1].id) if len(rows) > limit else None
+    voters = [{"id": row.id, "username": row.voter_username, "voted_at": row.created_at} for row in rows[:limit]]
+    return voters, next_cursor
+
+def get_poll_voters_page(db: Session, poll_id: int, limit: int, option: Optional[int] = None,
+                         cursor: Optional[str] = None) -> dict:
+    """Get a page of voters for every option, or for one option when given"""
+    tally = db.get(PollTally, poll_id)
+    page = {
+        "poll_id": poll_id,
+        "version": tally.version if tally else 0,
+        "option1_voters": [],
+        "option2_voters": [],
+        "option3_voters": [],
+        "option4_voters": [],
+        "next_cursors": {}
+    }
+    for number in ([option] if option else range(1, 5)):
+        voters, next_cursor = get_option_voters(db, poll_id, number, cursor, limit)
+        page[f"option{number}_voters"] = voters
+        if next_cursor:
+            page["next_cursors"][f"option{number}"] = next_cursor
+    return page
+
+def iter_poll_voters(db: Session, poll_id: int, option: Optional[int] = None, batch_size: int = 1000):
+    """Yield a poll's voters in batches from a server-side cursor, ordered by option then vote"""
+    statement = select(Vote.id, Vote.option, Vote.voter_username, Vote.created_at).where(Vote.poll_id == poll_id)
+    if option:
+        statement = statement.where(Vote.option == option)
+    statement = statement.order_by(Vote.option, Vote.id).execution_options(stream_results=True, yield_per=batch_size)
+    for rows in db.exec(statement).partitions():
+        yield [
+            {"id": row.id, "option": row.option, "username": row.voter_username, "voted_at": row.created_at}
+            for row in rows
+        ]
+
+def get_voter_changes(db: Session, poll_id: int, since: int, limit: int = 1000) -> dict:
+    """Get voter list changes after a version, or flag that the client must refetch the list"""
+    tally = db.get(PollTally, poll_id)
+    version = tally.version if tally else 0
+    rows = db.exec(
+        select(VoterChange)
+        .where(VoterChange.poll_id == poll_id, VoterChange.version > since)
+        .order_by(VoterChange.version)
+        .limit(limit)
+    ).all()
+    changes = [VoterChangeInfo.model_validate(row, from_attributes=True) for row in rows]
+    
+    # Versions not covered by the log (pruned or too many) need a full refetch
+    expected = list(range(since + 1, since + 1 + len(changes)))
+    complete = [change.version for change in changes] == expected and since + len(changes) == version
+    resync = since > version or not complete or any(change.kind == "resync" for change in changes)
+    
+    return {
+        "poll_id": poll_id,
+        "version": version,
+        "resync": resync,
+        "changes": [] if resync else changes
+    }
+
 def get_user_likes_given(db: Session, username: str) -> List[str]:
     """Get list of usernames that this user has liked"""
     user_likes = db.exec(
@@ -209,29 +766,16 @@ def delete_user_like(db: Session, liker_username: str, liked_username: str) -> b
         return False  # Like doesn't exist
     
     db.delete(user_like)
+    update_user_stats(db, {liked_username: {"likes_received": -1}})
     db.commit()
     return True
 
 def get_user_profile(db: Session, username: str) -> dict:
     """Get user profile statistics"""
-    # Count polls created by this user
-    polls_created = db.exec(
-        select(Poll).where(Poll.creator_username == username)
-    ).all()
-    polls_count = len(polls_created)
-    
-    # Count total votes by this user
-    user_votes = db.exec(
-        select(Vote).where(Vote.voter_username == username)
-    ).all()
-    total_votes = len(user_votes)
-    
-    # Count likes received by this user
-    likes_received = get_user_likes_count(db, username)
-    
+    stats = db.get(UserStats, username) or UserStats(username=username)
     return {
         "username": username,
-        "likes_received": likes_received,
-        "polls_created": polls_count,
-        "total_votes": total_votes
+        "likes_received": stats.likes_received,
+        "polls_created": stats.polls_created,
+        "total_votes": stats.total_votes
     }
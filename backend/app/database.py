@@ -1,18 +1,183 @@
-from sqlmodel import SQLModel, create_engine, Session
-from typing import Optional
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from app.metrics import track_queries
+import logging
 import os
 
 # Database URL - using SQLite for simplicity
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./polls.db")
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+# SQL logging is off unless asked for
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+
+# Connection pool settings, shared by the sync and async engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# "wal" tunes file-backed SQLite for concurrent use: WAL journal, one writer
+# connection and a pool of read-only connections. "default" keeps SQLite's
+# own settings and one pool for reads and writes.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "wal")
+# NORMAL only risks the last commits on power loss in WAL mode, never corruption
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Reader connections per engine under the WAL profile
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+
+def to_async_url(url: str) -> str:
+    """Swap a sync driver URL for its async driver equivalent"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+def is_memory_sqlite(url: str) -> bool:
+    return ":memory:" in url or url.endswith("://")
+
+def uses_wal_profile(url: str) -> bool:
+    """Whether the WAL storage profile applies to a database URL"""
+    return SQLITE_PROFILE == "wal" and url.startswith("sqlite") and not is_memory_sqlite(url)
+
+def engine_options(url: str, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW) -> dict:
+    """Engine keyword arguments for a database URL"""
+    options = {"echo": SQL_ECHO}
+    if url.startswith("sqlite"):
+        # Sessions may be used from more than one thread
+        options["connect_args"] = {"check_same_thread": False}
+        if is_memory_sqlite(url):
+            return options
+    options["pool_size"] = pool_size
+    options["max_overflow"] = max_overflow
+    return options
+
+def sqlite_pragmas(writer: bool) -> list:
+    """PRAGMAs run on every new connection under the WAL profile"""
+    pragmas = [
+        f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"synchronous={SQLITE_SYNCHRONOUS}",
+        # Negative sizes are KiB rather than pages
+        f"cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"mmap_size={SQLITE_MMAP_SIZE}",
+        "temp_store=MEMORY"
+    ]
+    if writer:
+        # WAL is stored in the database file, so the writer switches it on for every connection
+        pragmas.insert(0, "journal_mode=WAL")
+    else:
+        pragmas.append("query_only=ON")
+    return pragmas
+
+def tune_sqlite(engine, writer: bool):
+    """Apply the WAL profile PRAGMAs to every connection an engine opens"""
+    pragmas = sqlite_pragmas(writer)
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    event.listen(getattr(engine, "sync_engine", engine), "connect", on_connect)
+
+def create_writer_engine(create, url: str):
+    """An engine for writes, a single tuned connection under the WAL profile"""
+    if uses_wal_profile(url):
+        # Writes queue for the one connection in the pool instead of retrying on the database lock
+        writer = create(url, **engine_options(url, pool_size=1, max_overflow=0))
+        tune_sqlite(writer, writer=True)
+    else:
+        writer = create(url, **engine_options(url))
+    track_queries(writer)
+    return writer
+
+def create_read_engine(create, url: str, writer=None):
+    """An engine for reads, a pool of read-only connections under the WAL profile and the writer otherwise"""
+    if not uses_wal_profile(url):
+        return writer
+    reader = create(url, **engine_options(url, pool_size=DB_READ_POOL_SIZE))
+    tune_sqlite(reader, writer=False)
+    track_queries(reader)
+    return reader
+
+logger = logging.getLogger(__name__)
+
+# Create engines, reads that don't need the request's own writes use the read engines
+engine = create_writer_engine(create_engine, DATABASE_URL)
+read_engine = create_read_engine(create_engine, DATABASE_URL, engine)
+
+# Async engines, None when the async driver isn't installed. Under the WAL profile there is no async writer.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+try:
+    if uses_wal_profile(ASYNC_DATABASE_URL):
+        # Async sessions write through the writer connection in a worker thread, so a crud call
+        # holds it start to finish rather than waiting on the event loop between statements
+        async_engine = None
+        async_read_engine = create_read_engine(create_async_engine, ASYNC_DATABASE_URL)
+    else:
+        async_engine = async_read_engine = create_writer_engine(create_async_engine, ASYNC_DATABASE_URL)
+except ImportError:
+    async_engine = async_read_engine = None
+
+class ThreadedSession:
+    """Runs sync session work in a worker thread when there is no async writer engine"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.session.close)
 
 def create_db_and_tables():
-    """Create database tables"""
-    SQLModel.metadata.create_all(engine)
+    """Create database tables and migrate existing ones"""
+    from app.migrations import migrate
+    changes = migrate(engine)
+    if any(changes.values()):
+        logger.info("migrated database", extra={"changes": changes})
 
 def get_session():
     """Get database session"""
     with Session(engine) as session:
         yield session
+
+def get_read_session():
+    """Get a database session for reads"""
+    with Session(read_engine) as session:
+        yield session
+
+async def get_async_session():
+    """Get a database session that doesn't block the event loop"""
+    if async_engine is not None:
+        async with AsyncSession(async_engine) as session:
+            yield session
+    else:
+        session = ThreadedSession(Session(engine))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+async def get_async_read_session():
+    """Get a database session for reads that doesn't block the event loop"""
+    if async_read_engine is not None:
+        async with AsyncSession(async_read_engine) as session:
+            yield session
+    else:
+        session = ThreadedSession(Session(read_engine))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+# For background tasks that need a session outside a request
+open_async_session = asynccontextmanager(get_async_session)
+open_async_read_session = asynccontextmanager(get_async_read_session)
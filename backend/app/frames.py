@@ -0,0 +1,130 @@
+"""WebSocket frames that are encoded once and shared by every recipient.
+
+An event published to 10k sockets is serialized a single time. The same ASGI
+send message is then handed to each socket, so per-socket work is the send
+itself. JSON goes through orjson when it's installed and stdlib json otherwise.
+
+Clients can ask for the compact binary encoding, where vote_update events
+are a fixed 29-byte layout (see VOTE_UPDATE_STRUCT) and every other event
+stays JSON text. Each encoding is built at most once per frame.
+"""
+from typing import Dict, Optional
+import json
+import struct
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_ENCODER = "orjson" if orjson is not None else "json"
+
+# Encodings a client can negotiate with its hello message
+JSON_ENCODING = "json"
+BINARY_ENCODING = "binary"
+ENCODINGS = (JSON_ENCODING, BINARY_ENCODING)
+
+# Binary vote_update: message type, poll_id, seq, option1..option4, topic_seq, big-endian
+VOTE_UPDATE_STRUCT = struct.Struct("!BIIIIIII")
+BINARY_VOTE_UPDATE = 1
+
+def encode_json(payload) -> str:
+    """Serialize a payload to compact JSON text"""
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload, separators=(",", ":"))
+
+class EncodingStats:
+    """Bytes and CPU per message for each wire encoding"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modes: Dict[str, Dict[str, int]] = {}
+
+    def _mode(self, mode: str) -> Dict[str, int]:
+        return self._modes.setdefault(mode, {"messages": 0, "bytes_in": 0, "bytes": 0, "encodes": 0, "encode_ns": 0})
+
+    def record_encode(self, mode: str, elapsed_ns: int):
+        with self._lock:
+            counters = self._mode(mode)
+            counters["encodes"] += 1
+            counters["encode_ns"] += elapsed_ns
+
+    def record_send(self, mode: str, size: int, size_in: Optional[int] = None):
+        with self._lock:
+            counters = self._mode(mode)
+            counters["messages"] += 1
+            counters["bytes"] += size
+            # Only compressing modes know the size before encoding
+            if size_in is not None:
+                counters["bytes_in"] += size_in
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for mode, counters in self._modes.items():
+                messages = counters["messages"] or 1
+                result[mode] = {
+                    "messages": counters["messages"],
+                    "bytes": counters["bytes"],
+                    "bytes_per_message": round(counters["bytes"] / messages, 1),
+                    "compression_ratio": round(counters["bytes"] / counters["bytes_in"], 3) if counters["bytes_in"] else None,
+                    "encodes": counters["encodes"],
+                    # Encoding is shared by all recipients of a frame, so this is amortized per send
+                    "cpu_us_per_message": round(counters["encode_ns"] / messages / 1000, 3)
+                }
+            return result
+
+encoding_stats = EncodingStats()
+
+class Frame:
+    """One outbound event, shared read-only between all connection queues"""
+
+    __slots__ = ("text", "key", "payload", "_messages")
+
+    def __init__(self, text: str, key: Optional[str] = None, payload: Optional[dict] = None):
+        self.text = text
+        # Coalescing key, frames with the same key replace each other in a full queue
+        self.key = key
+        self.payload = payload
+        # ASGI servers only read the message, so one dict serves every socket
+        self._messages: Dict[str, dict] = {JSON_ENCODING: {"type": "websocket.send", "text": text}}
+
+    @classmethod
+    def from_payload(cls, payload: dict, key: Optional[str] = None) -> "Frame":
+        start = time.perf_counter_ns()
+        frame = cls(encode_json(payload), key, payload)
+        encoding_stats.record_encode(JSON_ENCODING, time.perf_counter_ns() - start)
+        return frame
+
+    @property
+    def message(self) -> dict:
+        return self._messages[JSON_ENCODING]
+
+    def message_for(self, encoding: str) -> dict:
+        """The ASGI send message for an encoding, built on first use"""
+        message = self._messages.get(encoding)
+        if message is None:
+            start = time.perf_counter_ns()
+            message = self._encode(encoding)
+            encoding_stats.record_encode(encoding, time.perf_counter_ns() - start)
+            self._messages[encoding] = message
+        return message
+
+    def _encode(self, encoding: str) -> dict:
+        if encoding == BINARY_ENCODING:
+            # Frames from other workers only carry text
+            payload = self.payload if self.payload is not None else json.loads(self.text)
+            if payload.get("type") == "vote_update":
+                votes = payload["data"]["votes"]
+                topic_seq = payload.get("topic_seq", {}).get(f"poll:{payload['poll_id']}", 0)
+                data = VOTE_UPDATE_STRUCT.pack(
+                    BINARY_VOTE_UPDATE, payload["poll_id"], payload.get("seq", 0) & 0xFFFFFFFF,
+                    votes["option1"], votes["option2"], votes["option3"], votes["option4"],
+                    topic_seq & 0xFFFFFFFF
+                )
+                return {"type": "websocket.send", "bytes": data}
+        # No compact layout for this event, send it as JSON
+        return self.message
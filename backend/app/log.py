@@ -0,0 +1,56 @@
+"""Logging for the app's own loggers.
+
+Hot paths log at DEBUG behind `logger.isEnabledFor`, so with the default
+INFO level they build no message and no fields. Extra fields passed with
+`extra={...}` are rendered as key=value pairs, or as JSON keys with
+LOG_FORMAT=json.
+"""
+import json
+import logging
+import os
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" for people, "json" for log shippers
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Attributes every LogRecord has, anything else came in through extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+def record_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **record_fields(record)
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level: str = LOG_LEVEL, format: str = LOG_FORMAT):
+    """Send the app's loggers to stderr, leaving uvicorn's logging alone"""
+    logger = logging.getLogger("app")
+    if any(getattr(handler, "_app_handler", False) for handler in logger.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler._app_handler = True
+    handler.setFormatter(JsonFormatter() if format == "json" else TextFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
@@ -1,12 +1,20 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session
-from app.database import create_db_and_tables, get_session
+from fastapi.responses import PlainTextResponse
+from app.database import create_db_and_tables, engine, read_engine, async_engine, async_read_engine, open_async_read_session
 from app.routes import polls, votes, users
 from app.websocket_manager import manager
-from app.crud import poll_to_response
+from app import async_crud
+from app.cache import tally_cache, poll_versions, response_cache
+from app.vote_ingest import vote_ingestor
+from app.admission import admission_stats
+from app.log import configure_logging
+from app.metrics import MetricsMiddleware, registry
+from app.profiler import QUERY_PROFILING, N_PLUS_ONE_THRESHOLD, QueryProfilerMiddleware, profile_engine, recent_profiles
 import json
 
+configure_logging()
+
 # Create FastAPI app
 app = FastAPI(
     title="Real-time Polling API",
@@ -22,6 +30,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in, adds nothing to requests unless enabled
+if QUERY_PROFILING:
+    for profiled in {engine, read_engine, async_engine, async_read_engine} - {None}:
+        profile_engine(profiled)
+    app.add_middleware(QueryProfilerMiddleware)
 
 # Include routers
 app.include_router(polls.router)
@@ -33,6 +48,51 @@ def on_startup():
     """Initialize database on startup"""
     create_db_and_tables()
 
+def on_remote_event(topics, message, key):
+    """Keep this worker's caches in step with writes handled by other workers"""
+    event = json.loads(message)
+    if event["type"] in ("vote_update", "poll_deleted"):
+        tally_cache.invalidate(event["poll_id"])
+    if event["type"] in ("vote_update", "poll_created", "poll_deleted"):
+        poll_versions.bump(event["poll_id"])
+    if event["type"] == "poll_deleted":
+        vote_ingestor.forget(event["poll_id"])
+
+async def poll_snapshot(topic):
+    """Current votes and likes of a poll for a client that fell behind on its topic"""
+    async with open_async_read_session() as db:
+        poll = await async_crud.get_poll(db, int(topic.split(":", 1)[1]))
+        if poll is None:
+            return None
+        response = await async_crud.poll_to_response(db, poll)
+    return response.model_dump(mode="json")
+
+async def user_snapshot(topic):
+    """Current like count of a user"""
+    username = topic.split(":", 1)[1]
+    async with open_async_read_session() as db:
+        likes_count = await async_crud.get_user_likes_count(db, username)
+    return {"username": username, "likes_count": likes_count}
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Join the WebSocket backplane and start the batched vote flusher when enabled"""
+    manager.remote_listeners.append(on_remote_event)
+    # Feed and voter list snapshots carry no data, clients refetch those
+    manager.snapshot_providers.update({"poll": poll_snapshot, "user": user_snapshot})
+    await manager.start()
+    await vote_ingestor.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Flush queued votes and close pooled async connections on shutdown"""
+    await vote_ingestor.stop()
+    await manager.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_read_engine not in (None, async_engine):
+        await async_read_engine.dispose()
+
 @app.get("/")
 def read_root():
     """Root endpoint"""
@@ -43,17 +103,43 @@ def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/stats")
+def stats():
+    """Cache, vote ingestion, WebSocket and backplane statistics"""
+    return {
+        "tally_cache": tally_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "vote_ingest": vote_ingestor.stats(),
+        "admission": admission_stats(),
+        "websocket": manager.stats(),
+        "backplane": manager.backplane.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Counters and histograms in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/queries")
+def debug_queries(n_plus_one: bool = False):
+    """Query profiles of recent requests, newest first, with QUERY_PROFILING=true"""
+    if not QUERY_PROFILING:
+        raise HTTPException(status_code=404, detail="Query profiling is disabled")
+    profiles = [profile for profile in reversed(recent_profiles) if profile["n_plus_one"] or not n_plus_one]
+    return {"n_plus_one_threshold": N_PLUS_ONE_THRESHOLD, "profiles": profiles}
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates"""
-    await manager.connect(websocket)
+    if not await manager.connect(websocket):
+        return
     try:
         while True:
-            # Keep connection alive and handle any incoming messages
+            # Clients send hello, pong and subscribe/unsubscribe requests for topics
             data = await websocket.receive_text()
-            # For now, we don't need to handle incoming messages from clients
-            # But we could add features like chat or comments here
-    except WebSocketDisconnect:
+            await manager.handle_message(websocket, data)
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the server already closed a reaped or slow connection
         manager.disconnect(websocket)
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+"""In-process counters, gauges and histograms, exposed in Prometheus text format.
+
+Modules declare their metrics at import time and update them on the hot path:
+
+    VOTES = metrics.counter("votes_total", "Votes accepted", ["mode"])
+    VOTES.labels("direct").inc()
+
+Values that already live elsewhere (connection counts, cache counters) are
+read when /metrics is scraped through gauge callbacks instead of being
+updated on every change. Database queries are counted per request through
+a SQLAlchemy event and a context variable set by MetricsMiddleware.
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import event
+import threading
+import time
+
+# Seconds, from sub-millisecond cache hits to slow commits
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class CounterValue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+class GaugeValue(CounterValue):
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+class HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        # One slot per bucket plus +Inf, cumulated when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the seconds spent in the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class Metric(ABC):
+    """A metric family, one value per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    @abstractmethod
+    def _new_value(self):
+        """A fresh value for one combination of label values"""
+
+    def labels(self, *values):
+        """The value for one combination of label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_value())
+        return child
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        return [(self.name, self.labelnames, values, child.value) for values, child in list(self._children.items())]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_value(self):
+        return CounterValue()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_value(self):
+        return GaugeValue()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self):
+        result = []
+        names = self.labelnames + ("le",)
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                result.append((f"{self.name}_bucket", names, values + (_format_value(bound),), cumulative))
+            result.append((f"{self.name}_sum", self.labelnames, values, child.sum))
+            result.append((f"{self.name}_count", self.labelnames, values, cumulative))
+        return result
+
+# Returns a value, or a mapping of label values to values
+GaugeReader = Callable[[], Union[float, Dict[Tuple[str, ...], float]]]
+
+class CallbackGauge(Metric):
+    """A gauge read from existing state when scraped"""
+
+    def __init__(self, name: str, documentation: str, read: GaugeReader, labelnames: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.read = read
+        self.kind = kind
+
+    def _new_value(self):
+        raise TypeError(f"{self.name} is read from a callback, it has no values to update")
+
+    def samples(self):
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [(self.name, self.labelnames, labels, value) for labels, value in values.items()]
+
+class Registry:
+    """Every metric of the process, rendered for /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Re-imported modules get the metric they registered before
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labelnames, values, value in samples:
+                lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames))
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+def gauge_callback(name: str, documentation: str, read: GaugeReader, labelnames: Sequence[str] = (), kind: str = "gauge") -> CallbackGauge:
+    """Register a metric read from existing state, kind "counter" for running totals"""
+    return registry.register(CallbackGauge(name, documentation, read, labelnames, kind))
+
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+HTTP_LATENCY = histogram("http_request_seconds", "Time to handle an HTTP request", ["route"])
+DB_QUERIES = counter("db_queries_total", "SQL statements executed")
+DB_QUERIES_PER_REQUEST = histogram("db_queries_per_request", "SQL statements executed by one HTTP request", ["route"], QUERY_BUCKETS)
+
+# Queries run by the current request, a list so threads and greenlets update the same count
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.inc()
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+def track_queries(engine):
+    """Count the statements an engine executes, async engines are tracked through their sync engine"""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _count_query):
+        event.listen(engine, "before_cursor_execute", _count_query)
+
+def request_query_count() -> Optional[int]:
+    """Statements executed so far by the current request"""
+    queries = _request_queries.get()
+    return queries[0] if queries is not None else None
+
+class MetricsMiddleware:
+    """Counts HTTP requests, their latency and their SQL statements per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+            # The route template keeps label cardinality bounded, unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_LATENCY.labels(route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status)).inc()
+            DB_QUERIES_PER_REQUEST.labels(route).observe(queries[0])
@@ -0,0 +1,80 @@
+"""Brings existing databases (such as an old polls.db) up to the current schema.
+
+create_all only creates missing tables, so columns and indexes added to
+existing tables are applied here. Every step is safe to run repeatedly.
+"""
+from sqlmodel import SQLModel, Session
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from app.crud import backfill_poll_tallies, reconcile_poll_tallies, reconcile_user_stats
+
+def add_missing_columns(engine: Engine) -> list:
+    """Add model columns that are missing from existing tables"""
+    added = []
+    with engine.begin() as conn:
+        # Inspect on the same connection, the engine may only have one
+        inspector = inspect(conn)
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                if column.default is not None and column.default.is_scalar:
+                    ddl += f" NOT NULL DEFAULT {column.default.arg!r}"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def dedupe_votes(engine: Engine) -> int:
+    """Keep only the latest vote per (poll_id, voter_ip) so the unique index can be built"""
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "DELETE FROM vote WHERE id NOT IN "
+            "(SELECT MAX(id) FROM vote GROUP BY poll_id, voter_ip)"
+        ))
+        return result.rowcount
+
+def create_missing_indexes(engine: Engine) -> list:
+    """Create model indexes that are missing from existing tables"""
+    inspector = inspect(engine)
+    created = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+                created.append(index.name)
+    return created
+
+def migrate(engine: Engine) -> dict:
+    """Apply all schema changes, returns what was done"""
+    # Stats rows of an existing database start out as a recount
+    new_user_stats = not inspect(engine).has_table("userstats")
+    SQLModel.metadata.create_all(engine)
+    columns = add_missing_columns(engine)
+
+    removed_votes = 0
+    vote_indexes = {index["name"] for index in inspect(engine).get_indexes("vote")}
+    if "ix_vote_poll_voter" not in vote_indexes:
+        removed_votes = dedupe_votes(engine)
+    indexes = create_missing_indexes(engine)
+
+    rebuilt_users = []
+    with Session(engine) as db:
+        # Polls from before the polltally table (or without a row) have no counts yet
+        rebuilt = reconcile_poll_tallies(db) if removed_votes else backfill_poll_tallies(db)
+    if removed_votes or new_user_stats:
+        with Session(engine) as db:
+            rebuilt_users = reconcile_user_stats(db)
+
+    return {
+        "added_columns": columns,
+        "removed_duplicate_votes": removed_votes,
+        "created_indexes": indexes,
+        "rebuilt_tallies": rebuilt,
+        "rebuilt_user_stats": len(rebuilt_users)
+    }
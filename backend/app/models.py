@@ -1,7 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index
 
 class Poll(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -12,7 +12,7 @@ class Poll(SQLModel, table=True):
     option3: Optional[str] = None
     option4: Optional[str] = None
     creator_username: Optional[str] = Field(default=None, index=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
@@ -28,6 +28,46 @@ class Vote(SQLModel, table=True):
     
     # Relationships
     poll: Poll = Relationship(back_populates="votes")
+    
+    __table_args__ = (
+        # One vote per voter per poll, also the lookup key for vote switching
+        Index("ix_vote_poll_voter", "poll_id", "voter_ip", unique=True),
+        # Covers tally counts and voter lists by option
+        Index("ix_vote_poll_option", "poll_id", "option"),
+    )
+
+class PollTally(SQLModel, table=True):
+    """Vote counts per option, kept in step with Vote rows"""
+    poll_id: int = Field(foreign_key="poll.id", primary_key=True)
+    option1: int = 0
+    option2: int = 0
+    option3: int = 0
+    option4: int = 0
+    # Bumped on every change so stale cache writes can be ignored
+    version: int = 0
+
+class VoterChange(SQLModel, table=True):
+    """Voter list changes per poll, replayed by clients that missed deltas"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    poll_id: int = Field(foreign_key="poll.id")
+    version: int
+    kind: str = Field(description="added, moved, renamed, reset or resync")
+    vote_id: Optional[int] = None
+    username: Optional[str] = None
+    from_option: Optional[int] = None
+    to_option: Optional[int] = None
+    voted_at: Optional[datetime] = None
+    
+    __table_args__ = (
+        Index("ix_voterchange_poll_version", "poll_id", "version", unique=True),
+    )
+
+class UserStats(SQLModel, table=True):
+    """Per-user counters, kept in step with Poll, Vote and UserLike rows"""
+    username: str = Field(primary_key=True)
+    likes_received: int = 0
+    polls_created: int = 0
+    total_votes: int = 0
 
 class UserLike(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -38,4 +78,6 @@ class UserLike(SQLModel, table=True):
     # Ensure one user can only like another user once
     __table_args__ = (
         UniqueConstraint('liker_username', 'liked_username', name='unique_user_like'),
+        # Lets like counts and "liked by" lookups be answered from the index alone
+        Index("ix_userlike_liked_liker", "liked_username", "liker_username"),
     )
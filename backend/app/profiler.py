@@ -0,0 +1,158 @@
+"""Opt-in per-request SQL profiling with N+1 detection.
+
+With QUERY_PROFILING=true every HTTP response carries X-DB-Queries,
+X-DB-Time-Ms and X-DB-Max-Repeats headers. Requests that run one
+statement shape N_PLUS_ONE_THRESHOLD times or more are flagged with
+X-DB-N-Plus-One and a warning. The last profiles are served by
+GET /debug/queries.
+
+Scripts and tests can profile a block directly:
+
+    with profile_queries() as profile:
+        client.get("/polls/")
+    assert profile.queries <= 3, profile.summary()
+"""
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, List, Optional
+from sqlalchemy import event
+import logging
+import os
+import re
+import threading
+import time
+
+QUERY_PROFILING = os.getenv("QUERY_PROFILING", "false").lower() in ("1", "true", "yes")
+# Repeats of one statement shape within a request that count as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Request profiles kept for /debug/queries
+PROFILE_HISTORY = int(os.getenv("QUERY_PROFILE_HISTORY", "100"))
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# IN lists of different lengths are the same shape
+_PARAMETER_LIST = re.compile(r"\((?:\s*(?:\?|%\([^)]*\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\([^)]*\)s|\$\d+|:\w+)\s*\)")
+
+def statement_shape(statement: str) -> str:
+    """A statement with its whitespace and parameter lists collapsed"""
+    return _PARAMETER_LIST.sub("(?...)", _WHITESPACE.sub(" ", statement).strip())
+
+class QueryProfile:
+    """Statements run while one profile was active"""
+
+    def __init__(self, label: str = "", parent: Optional["QueryProfile"] = None):
+        self.label = label
+        # An enclosing profile, e.g. a test around a profiled request, sees the same statements
+        self.parent = parent
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+        # Threads from the sync route pool share a request's profile
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.queries += 1
+            self.db_time += elapsed
+            self.shapes[shape] += 1
+        if self.parent is not None:
+            self.parent.record(statement, elapsed)
+
+    @property
+    def max_repeats(self) -> int:
+        return max(self.shapes.values(), default=0)
+
+    def repeated(self, threshold: int = 2) -> List[dict]:
+        """Statement shapes run at least threshold times, most repeated first"""
+        return [
+            {"statement": shape, "count": count}
+            for shape, count in self.shapes.most_common() if count >= threshold
+        ]
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[dict]:
+        return self.repeated(threshold)
+
+    def summary(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict:
+        return {
+            "label": self.label,
+            "queries": self.queries,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "distinct_statements": len(self.shapes),
+            "repeated": self.repeated(),
+            "n_plus_one": bool(self.n_plus_one(threshold))
+        }
+
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+recent_profiles: Deque[dict] = deque(maxlen=PROFILE_HISTORY)
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is not None:
+        starts = conn.info.get("query_start")
+        elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+        profile.record(statement, elapsed)
+
+def profile_engine(engine):
+    """Time the statements an engine runs while a profile is active"""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
+
+@contextmanager
+def profile_queries(label: str = ""):
+    """Profile the statements run inside the block on profiled engines"""
+    profile = QueryProfile(label, _current_profile.get())
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+class QueryProfilerMiddleware:
+    """Profiles each HTTP request and reports it in response headers"""
+
+    def __init__(self, app, threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/debug/"):
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        with profile_queries(f"{scope['method']} {scope['path']}") as profile:
+
+            async def send_wrapper(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    # Statements run after the headers are sent (streamed bodies) only reach /debug/queries
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(profile.queries).encode()))
+                    headers.append((b"x-db-time-ms", f"{profile.db_time * 1000:.3f}".encode()))
+                    headers.append((b"x-db-max-repeats", str(profile.max_repeats).encode()))
+                    suspects = profile.n_plus_one(self.threshold)
+                    if suspects:
+                        headers.append((b"x-db-n-plus-one", str(suspects[0]["count"]).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        summary = profile.summary(self.threshold)
+        summary.update(route=getattr(scope.get("route"), "path", None), status=status)
+        recent_profiles.append(summary)
+        suspects = profile.n_plus_one(self.threshold)
+        if suspects:
+            logger.warning("possible N+1 queries", extra={
+                "request": profile.label, "queries": profile.queries,
+                "statement": suspects[0]["statement"], "repeats": suspects[0]["count"]
+            })
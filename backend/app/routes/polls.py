@@ -1,71 +1,213 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from typing import List
-from app.database import get_session
-from app.models import Poll
-from app.schemas import PollCreate, PollResponse, PollListResponse, PollVotersResponse
-from app.crud import create_poll, get_polls, get_poll, poll_to_response, delete_poll, get_poll_voters
+from typing import Awaitable, Callable, Hashable, List, Optional
+from pydantic import BaseModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import read_engine, get_read_session, get_async_session, get_async_read_session
+from app.models import PollTally
+from app.schemas import (PollCreate, PollResponse, PollListResponse, PollVotersResponse, VoterChangesResponse,
+                         PollTalliesRequest, PollTalliesResponse)
+from app.crud import get_poll, get_poll_voters, get_poll_voters_page, iter_poll_voters, get_voter_changes
+from app.cache import poll_versions, response_cache
+from app import async_crud, metrics
+import json
+import os
 
 router = APIRouter(prefix="/polls", tags=["polls"])
 
+# Poll IDs accepted by one bulk tally request
+POLL_TALLIES_MAX_IDS = int(os.getenv("POLL_TALLIES_MAX_IDS", "500"))
+
+# Results: not_modified (304), cached (body from the response cache) or rendered
+POLL_READS = metrics.counter("poll_reads_total", "Poll reads by how they were answered", ["route", "result"])
+TALLY_BATCH_IDS = metrics.histogram("poll_tallies_ids", "Poll IDs asked for per bulk tally request", buckets=metrics.SIZE_BUCKETS)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag"""
+    if not if_none_match:
+        return False
+    # "*" isn't honoured, it would answer 304 for a poll that doesn't exist
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+async def versioned_response(request: Request, route: str, key: Hashable, etag: str,
+                             render: Callable[[], Awaitable[BaseModel]]) -> Response:
+    """Answer a read from its ETag or the response cache, rendering it only when both miss"""
+    # Clients revalidate every time, the ETag changes as soon as a write commits
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        POLL_READS.labels(route, "not_modified").inc()
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(key, etag)
+    if body is None:
+        # The ETag was read first, so a write committed meanwhile can only make the body newer than it
+        body = (await render()).model_dump_json().encode()
+        response_cache.set(key, etag, body)
+        POLL_READS.labels(route, "rendered").inc()
+    else:
+        POLL_READS.labels(route, "cached").inc()
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.post("/", response_model=PollResponse)
-def create_poll_endpoint(
+async def create_poll_endpoint(
     poll: PollCreate,
     request: Request,
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_session)
 ):
     """Create a new poll"""
-    db_poll = create_poll(db, poll)
-    return poll_to_response(db, db_poll)
+    db_poll = await async_crud.create_poll(db, poll)
+    response = await async_crud.poll_to_response(db, db_poll)
+    
+    # Feed subscribers, and other workers' poll list versions, learn about the new poll
+    from app.websocket_manager import manager
+    await manager.broadcast_poll_created(response.id, response.model_dump(mode="json"))
+    return response
 
 @router.get("/", response_model=PollListResponse)
-def get_polls_endpoint(
+async def get_polls_endpoint(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_session)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_session)
+):
+    """Get all polls, newest first. Prefer cursor over skip for deep pages."""
+    async def render():
+        try:
+            return await async_crud.list_poll_responses(db, skip=skip, limit=limit, cursor=cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return await versioned_response(request, "/polls/", ("polls", skip, limit, cursor), poll_versions.list_etag(), render)
+
+async def poll_tallies(db: AsyncSession, poll_ids: List[int]) -> PollTalliesResponse:
+    """Compact tallies of the requested polls"""
+    poll_ids = list(dict.fromkeys(poll_ids))
+    if len(poll_ids) > POLL_TALLIES_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {POLL_TALLIES_MAX_IDS} poll IDs per request")
+    TALLY_BATCH_IDS.observe(len(poll_ids))
+    tallies = await async_crud.get_poll_tallies(db, poll_ids) if poll_ids else {}
+    return PollTalliesResponse(
+        tallies={poll_id: list(tallies[poll_id]) for poll_id in poll_ids if poll_id in tallies},
+        missing=[poll_id for poll_id in poll_ids if poll_id not in tallies]
+    )
+
+# Registered before /{poll_id}, which would otherwise match "tallies"
+@router.get("/tallies", response_model=PollTalliesResponse)
+async def get_poll_tallies_endpoint(
+    ids: str = "",
+    db: AsyncSession = Depends(get_async_read_session)
 ):
-    """Get all polls"""
-    polls = get_polls(db, skip=skip, limit=limit)
-    poll_responses = [poll_to_response(db, poll) for poll in polls]
-    return PollListResponse(polls=poll_responses)
+    """Vote counts and versions of many polls, ?ids=1,2,3"""
+    try:
+        poll_ids = [int(poll_id) for poll_id in ids.split(",") if poll_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated poll IDs")
+    return await poll_tallies(db, poll_ids)
+
+@router.post("/tallies", response_model=PollTalliesResponse)
+async def post_poll_tallies_endpoint(
+    request: PollTalliesRequest,
+    db: AsyncSession = Depends(get_async_read_session)
+):
+    """Vote counts and versions of many polls, for ID lists too long for a query string"""
+    return await poll_tallies(db, request.ids)
 
 @router.get("/{poll_id}", response_model=PollResponse)
-def get_poll_endpoint(
+async def get_poll_endpoint(
+    request: Request,
     poll_id: int,
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     """Get a specific poll by ID"""
-    poll = get_poll(db, poll_id)
-    if not poll:
-        raise HTTPException(status_code=404, detail="Poll not found")
-    return poll_to_response(db, poll)
+    async def render():
+        poll = await async_crud.get_poll(db, poll_id)
+        if not poll:
+            raise HTTPException(status_code=404, detail="Poll not found")
+        return await async_crud.poll_to_response(db, poll)
+    
+    return await versioned_response(request, "/polls/{poll_id}", ("poll", poll_id), poll_versions.poll_etag(poll_id), render)
 
 @router.delete("/{poll_id}")
 async def delete_poll_endpoint(
     poll_id: int,
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_session)
 ):
     """Delete a poll"""
-    success = delete_poll(db, poll_id)
+    success = await async_crud.delete_poll(db, poll_id)
     if not success:
         raise HTTPException(status_code=404, detail="Poll not found")
     
     # Broadcast poll deletion to all connected clients
     from app.websocket_manager import manager
-    await manager.broadcast_poll_update(poll_id, "poll_deleted", {"poll_id": poll_id})
+    from app.vote_ingest import vote_ingestor
+    vote_ingestor.forget(poll_id)
+    await manager.broadcast_poll_deleted(poll_id)
     
     return {"message": "Poll deleted successfully"}
 
 @router.get("/{poll_id}/voters", response_model=PollVotersResponse)
 def get_poll_voters_endpoint(
     poll_id: int,
-    db: Session = Depends(get_session)
+    limit: Optional[int] = None,
+    option: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_session)
 ):
-    """Get all voters for a poll grouped by option"""
+    """Get voters for a poll grouped by option. Pass limit (and option/cursor) to page through large polls."""
     # Check if poll exists
     poll = get_poll(db, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
-    voters_data = get_poll_voters(db, poll_id)
+    if option is not None and not 1 <= option <= 4:
+        raise HTTPException(status_code=400, detail="Invalid vote option")
+    if cursor and option is None:
+        raise HTTPException(status_code=400, detail="cursor requires option")
+    
+    # Without paging parameters the full list is returned, as before
+    if limit is None and option is None:
+        return PollVotersResponse(**get_poll_voters(db, poll_id))
+    
+    try:
+        voters_data = get_poll_voters_page(db, poll_id, limit or 100, option, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     return PollVotersResponse(**voters_data)
+
+@router.get("/{poll_id}/voters/stream")
+def stream_poll_voters_endpoint(
+    poll_id: int,
+    option: Optional[int] = None,
+    db: Session = Depends(get_read_session)
+):
+    """Stream voters as NDJSON: a header line with the list version, then one line per voter"""
+    poll = get_poll(db, poll_id)
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    def lines():
+        # The request session is closed once the response starts, so the stream has its own
+        with Session(read_engine) as stream_db:
+            tally = stream_db.get(PollTally, poll_id)
+            yield json.dumps({"poll_id": poll_id, "version": tally.version if tally else 0}) + "\n"
+            for voters in iter_poll_voters(stream_db, poll_id, option):
+                yield "".join(
+                    json.dumps({**voter, "voted_at": voter["voted_at"].isoformat()}) + "\n" for voter in voters
+                )
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/{poll_id}/voters/changes", response_model=VoterChangesResponse)
+def get_voter_changes_endpoint(
+    poll_id: int,
+    since: int = 0,
+    db: Session = Depends(get_read_session)
+):
+    """Get voter list changes after a version, for clients catching up on missed deltas"""
+    poll = get_poll(db, poll_id)
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    return VoterChangesResponse(**get_voter_changes(db, poll_id, since))
@@ -1,24 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
-from app.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_read_session, get_async_session
 from app.schemas import UserLikeCreate, UserLikeResponse, UserProfileResponse
-from app.crud import create_user_like, get_user_likes_count, get_user_profile, get_user_likes_given, delete_user_like
+from app.crud import get_user_likes_count, get_user_profile, get_user_likes_given
+from app import async_crud
 from app.websocket_manager import manager
+from app.admission import like_gate
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/like", response_model=UserLikeResponse)
 async def like_user(
     user_like: UserLikeCreate,
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_session)
 ):
     """Like a user"""
-    db_like = create_user_like(db, user_like)
+    async with like_gate.admit(f"user:{user_like.liker_username}"):
+        return await handle_like(user_like, db)
+
+async def handle_like(user_like: UserLikeCreate, db: AsyncSession) -> UserLikeResponse:
+    """Store an admitted like and broadcast the liked user's new count"""
+    db_like = await async_crud.create_user_like(db, user_like)
     if not db_like:
         raise HTTPException(status_code=400, detail="Already liked this user or cannot like yourself")
     
     # Get updated likes count for the liked user
-    likes_count = get_user_likes_count(db, user_like.liked_username)
+    likes_count = await async_crud.get_user_likes_count(db, user_like.liked_username)
     
     # Broadcast user like update to all connected clients
     await manager.broadcast_user_like_update(user_like.liked_username, likes_count)
@@ -36,15 +44,20 @@ async def like_user(
 @router.delete("/like", response_model=UserLikeResponse)
 async def unlike_user(
     user_like: UserLikeCreate,
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_session)
 ):
     """Unlike a user"""
-    success = delete_user_like(db, user_like.liker_username, user_like.liked_username)
+    async with like_gate.admit(f"user:{user_like.liker_username}"):
+        return await handle_unlike(user_like, db)
+
+async def handle_unlike(user_like: UserLikeCreate, db: AsyncSession) -> UserLikeResponse:
+    """Remove an admitted like and broadcast the liked user's new count"""
+    success = await async_crud.delete_user_like(db, user_like.liker_username, user_like.liked_username)
     if not success:
         raise HTTPException(status_code=400, detail="Like doesn't exist")
     
     # Get updated likes count for the liked user
-    likes_count = get_user_likes_count(db, user_like.liked_username)
+    likes_count = await async_crud.get_user_likes_count(db, user_like.liked_username)
     
     # Broadcast user like update to all connected clients
     await manager.broadcast_user_like_update(user_like.liked_username, likes_count)
@@ -62,7 +75,7 @@ async def unlike_user(
 @router.get("/{username}/profile", response_model=UserProfileResponse)
 def get_user_profile_endpoint(
     username: str,
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Get user profile with stats"""
     profile = get_user_profile(db, username)
@@ -71,7 +84,7 @@ def get_user_profile_endpoint(
 @router.get("/{username}/likes")
 def get_user_likes_endpoint(
     username: str,
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Get likes count for a user"""
     likes_count = get_user_likes_count(db, username)
@@ -80,7 +93,7 @@ def get_user_likes_endpoint(
 @router.get("/{username}/likes-given")
 def get_user_likes_given_endpoint(
     username: str,
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Get the list of users that this user has liked"""
     liked_users = get_user_likes_given(db, username)
@@ -1,54 +1,80 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session, open_async_read_session
 from app.schemas import VoteCreate, VoteResponse
-from app.crud import create_vote, get_vote_stats, get_poll
-from app.models import Vote
+from app.async_crud import record_vote, get_vote_stats, get_versioned_vote_stats, get_poll, reset_poll_votes as reset_votes
 from app.websocket_manager import manager
+from app.vote_ingest import vote_ingestor, PendingVote, VoteQueueFull
+from app.admission import vote_gate
+from app import metrics
+import hashlib
+import logging
 
 router = APIRouter(prefix="/polls", tags=["votes"])
 
+logger = logging.getLogger(__name__)
+
+# Phases: lookup (poll or option count), commit (write or queue), tally, broadcast
+VOTE_PHASE_SECONDS = metrics.histogram("vote_phase_seconds", "Time spent in each phase of handling a vote", ["phase"])
+VOTES = metrics.counter("votes_total", "Votes accepted", ["mode"])
+
+def compute_voter_id(request: Request, voter_username: Optional[str]) -> str:
+    """The ID a vote is stored under: client IP, a User-Agent hash and the username if given"""
+    user_agent = request.headers.get("user-agent", "")
+    user_agent_hash = hashlib.md5(user_agent.encode()).hexdigest()[:8]
+    voter_id = f"{request.client.host}_{user_agent_hash}"
+    if voter_username:
+        voter_id = f"{voter_id}_{voter_username}"
+    return voter_id
+
 @router.post("/{poll_id}/vote", response_model=VoteResponse)
 async def vote_on_poll(
     poll_id: int,
     vote: VoteCreate,
     request: Request,
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_session)
 ):
     """Vote on a poll"""
-    # Get client IP and User-Agent for better tracking
-    client_ip = request.client.host
-    user_agent = request.headers.get("user-agent", "")
+    voter_id = compute_voter_id(request, vote.voter_username)
     
-    # Always use User-Agent + username for better differentiation
-    import hashlib
-    user_agent_hash = hashlib.md5(user_agent.encode()).hexdigest()[:8]
-    
-    # Create unique ID: IP + User-Agent hash + username
-    voter_id = f"{client_ip}_{user_agent_hash}"
-    
-    # Add username if provided for additional uniqueness
-    if vote.voter_username:
-        voter_id = f"{voter_id}_{vote.voter_username}"
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("vote request", extra={"poll_id": poll_id, "option": vote.option, "voter_id": voter_id,
+                                            "user_agent": request.headers.get("user-agent", "")[:50]})
     
-    print(f"Vote request - IP: {client_ip}, User-Agent: {user_agent[:50]}..., Username: {vote.voter_username}, Voter ID: {voter_id}")
+    # Rejected before any database work, the session above hasn't connected yet
+    async with vote_gate.admit(f"voter:{voter_id}", vote.voter_username and f"user:{vote.voter_username}"):
+        return await handle_vote(poll_id, vote, voter_id, db)
+
+async def handle_vote(poll_id: int, vote: VoteCreate, voter_id: str, db: AsyncSession) -> VoteResponse:
+    """Record an admitted vote and broadcast the new tally"""
+    if vote_ingestor.enabled:
+        return await queue_vote(poll_id, vote, voter_id)
     
-    # Check if poll exists
-    poll = get_poll(db, poll_id)
+    # Check if poll exists on a reader, closed before the write takes the writer connection
+    with VOTE_PHASE_SECONDS.labels("lookup").time():
+        async with open_async_read_session() as read_db:
+            poll = await get_poll(read_db, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
     # Create vote (or update existing vote)
-    db_vote = create_vote(db, poll_id, vote, voter_id)
-    if not db_vote:
+    with VOTE_PHASE_SECONDS.labels("commit").time():
+        result = await record_vote(db, poll_id, vote, voter_id)
+    if not result:
         raise HTTPException(status_code=400, detail="Invalid vote option")
+    _, change = result
     
     # Get updated vote stats
-    votes = get_vote_stats(db, poll_id)
+    with VOTE_PHASE_SECONDS.labels("tally").time():
+        version, votes = await get_versioned_vote_stats(db, poll_id)
     
     # Broadcast update to all connected clients
-    print(f"Broadcasting vote update for poll {poll_id}: {votes.model_dump()}")
-    await manager.broadcast_vote_update(poll_id, votes.model_dump())
+    with VOTE_PHASE_SECONDS.labels("broadcast").time():
+        await manager.broadcast_vote_update(poll_id, votes.model_dump(), version)
+        if change:
+            await manager.broadcast_voters_delta(poll_id, [change])
+    VOTES.labels("direct").inc()
     
     return VoteResponse(
         success=True,
@@ -56,28 +82,49 @@ async def vote_on_poll(
         votes=votes
     )
 
+async def queue_vote(poll_id: int, vote: VoteCreate, voter_id: str) -> VoteResponse:
+    """Validate a vote against the cached poll definition and queue it for a batched commit"""
+    with VOTE_PHASE_SECONDS.labels("lookup").time():
+        async with open_async_read_session() as db:
+            option_count = await vote_ingestor.option_count(db, poll_id)
+    if option_count is None:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    if vote.option < 1 or vote.option > option_count:
+        raise HTTPException(status_code=400, detail="Invalid vote option")
+    
+    try:
+        with VOTE_PHASE_SECONDS.labels("commit").time():
+            vote_ingestor.submit(PendingVote(poll_id, voter_id, vote.option, vote.voter_username))
+    except VoteQueueFull:
+        raise HTTPException(status_code=503, detail="Too many votes, try again", headers={"Retry-After": "1"})
+    VOTES.labels("write_behind").inc()
+    
+    # The tally catches up when the batch is committed and broadcast
+    with VOTE_PHASE_SECONDS.labels("tally").time():
+        async with open_async_read_session() as db:
+            votes = await get_vote_stats(db, poll_id)
+    return VoteResponse(
+        success=True,
+        message="Vote accepted",
+        votes=votes
+    )
+
 @router.post("/{poll_id}/reset-votes")
 async def reset_poll_votes(
     poll_id: int,
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_session)
 ):
     """Reset all votes for a poll (development only)"""
     # Check if poll exists
-    poll = get_poll(db, poll_id)
+    poll = await get_poll(db, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
     
     # Delete all votes for this poll
-    votes = db.exec(select(Vote).where(Vote.poll_id == poll_id)).all()
-    for vote in votes:
-        db.delete(vote)
-    
-    db.commit()
-    
-    # Get updated vote stats
-    votes = get_vote_stats(db, poll_id)
+    votes, change = await reset_votes(db, poll_id)
     
     # Broadcast update to all connected clients
-    await manager.broadcast_vote_update(poll_id, votes.model_dump())
+    await manager.broadcast_vote_update(poll_id, votes.model_dump(), change.version)
+    await manager.broadcast_voters_delta(poll_id, [change])
     
     return {"message": "Votes reset successfully", "votes": votes.model_dump()}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # Request schemas
@@ -43,6 +43,17 @@ class PollResponse(BaseModel):
 
 class PollListResponse(BaseModel):
     polls: List[PollResponse]
+    # Pass as ?cursor= to get the next page
+    next_cursor: Optional[str] = None
+
+class PollTalliesRequest(BaseModel):
+    ids: List[int]
+
+class PollTalliesResponse(BaseModel):
+    # poll_id -> [version, option1, option2, option3, option4], version is the voter list version
+    tallies: Dict[int, List[int]]
+    # Requested IDs that don't match a poll
+    missing: List[int]
 
 class VoteResponse(BaseModel):
     success: bool
@@ -61,15 +72,34 @@ class UserProfileResponse(BaseModel):
     total_votes: int
 
 class VoterInfo(BaseModel):
+    id: Optional[int] = None  # vote ID, stable when the voter switches options
     username: Optional[str]
     voted_at: datetime
 
 class PollVotersResponse(BaseModel):
     poll_id: int
+    version: int = 0
     option1_voters: List[VoterInfo]
     option2_voters: List[VoterInfo]
     option3_voters: List[VoterInfo]
     option4_voters: List[VoterInfo]
+    # Cursor for the next page of each option with more voters, only set for paginated requests
+    next_cursors: Optional[Dict[str, str]] = None
+
+class VoterChangeInfo(BaseModel):
+    version: int
+    kind: str  # "added", "moved", "renamed", "reset" or "resync"
+    vote_id: Optional[int] = None
+    username: Optional[str] = None
+    from_option: Optional[int] = None
+    to_option: Optional[int] = None
+    voted_at: Optional[datetime] = None
+
+class VoterChangesResponse(BaseModel):
+    poll_id: int
+    version: int
+    resync: bool  # True when the client must refetch the full voters list
+    changes: List[VoterChangeInfo]
 
 # WebSocket message schemas
 class WebSocketMessage(BaseModel):
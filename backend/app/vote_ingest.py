@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from app import async_crud
+from app.crud import count_options
+from app.database import open_async_session
+from app.websocket_manager import manager
+from app import metrics
+import asyncio
+import logging
+import os
+import time
+
+# "direct" writes each vote in its request, "write_behind" queues votes for batched commits
+VOTE_INGEST_MODE = os.getenv("VOTE_INGEST_MODE", "direct")
+VOTE_QUEUE_SIZE = int(os.getenv("VOTE_QUEUE_SIZE", "10000"))
+VOTE_BATCH_SIZE = int(os.getenv("VOTE_BATCH_SIZE", "500"))
+VOTE_BATCH_MS = int(os.getenv("VOTE_BATCH_MS", "20"))
+# Attempts after a failed batch commit before its votes are given up, with doubling backoff
+VOTE_FLUSH_RETRIES = int(os.getenv("VOTE_FLUSH_RETRIES", "5"))
+VOTE_FLUSH_BACKOFF_MS = int(os.getenv("VOTE_FLUSH_BACKOFF_MS", "100"))
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = metrics.histogram("vote_batch_size", "Votes committed per write-behind batch", buckets=(1, 10, 50, 100, 250, 500, 1000, 5000))
+# The write-behind commit phase, broadcasting included
+BATCH_SECONDS = metrics.histogram("vote_batch_flush_seconds", "Time to commit and broadcast a write-behind batch")
+
+class VoteQueueFull(Exception):
+    """Raised when the ingestion queue can't take more votes"""
+
+@dataclass
+class PendingVote:
+    poll_id: int
+    voter_ip: str
+    option: int
+    voter_username: Optional[str]
+
+class VoteIngestor:
+    """Acknowledges votes immediately and commits them in batches from a background task"""
+
+    def __init__(self, mode: str = VOTE_INGEST_MODE, queue_size: int = VOTE_QUEUE_SIZE,
+                 batch_size: int = VOTE_BATCH_SIZE, batch_ms: int = VOTE_BATCH_MS,
+                 retries: int = VOTE_FLUSH_RETRIES, backoff_ms: int = VOTE_FLUSH_BACKOFF_MS):
+        self.enabled = mode == "write_behind"
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_window = batch_ms / 1000
+        self.retries = retries
+        self.backoff = backoff_ms / 1000
+        self.queue: Optional[asyncio.Queue] = None
+        self.poll_options: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        # The batch being collected or committed, flushed by stop() ahead of the queue
+        self._in_flight: List[PendingVote] = []
+        self.flushed = 0
+        self.rejected = 0
+        self.retried = 0
+        # Acknowledged votes that never committed
+        self.lost = 0
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and commit whatever is still queued"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Replaying a batch that did commit changes nothing, votes are upserts
+        batch, self._in_flight = self._in_flight, []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            await self._flush(batch)
+
+    async def option_count(self, db, poll_id: int) -> Optional[int]:
+        """Number of options of a poll, from the cached poll definition when possible"""
+        count = self.poll_options.get(poll_id)
+        if count is None:
+            poll = await async_crud.get_poll(db, poll_id)
+            if poll is None:
+                return None
+            count = count_options(poll)
+            self.poll_options[poll_id] = count
+        return count
+
+    def forget(self, poll_id: int):
+        """Drop the cached definition of a deleted poll"""
+        self.poll_options.pop(poll_id, None)
+
+    def submit(self, vote: PendingVote):
+        """Queue a validated vote, raises VoteQueueFull under back-pressure"""
+        try:
+            self.queue.put_nowait(vote)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise VoteQueueFull()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_size": self.queue_size,
+            "flushed": self.flushed,
+            "rejected": self.rejected,
+            "retried": self.retried,
+            "lost": self.lost
+        }
+
+    async def _run(self):
+        while True:
+            # Collected in place so stop() sees every vote taken off the queue
+            batch = self._in_flight = [await self.queue.get()]
+            # Collect until the batch is full or the window closes
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            except Exception:
+                # The votes are committed, only their broadcast failed
+                logger.exception("failed to broadcast vote batch", extra={"votes": len(batch)})
+            self._in_flight = []
+
+    async def _flush(self, batch: List[PendingVote]):
+        with BATCH_SECONDS.time():
+            result = await self._commit_with_retry(batch)
+            if result is not None:
+                await self._broadcast(*result)
+        BATCH_SIZE.observe(len(batch))
+
+    async def _commit_with_retry(self, batch: List[PendingVote]):
+        """Commit a batch, retrying with backoff, returns None once the votes are given up"""
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._commit(batch)
+            except Exception as e:
+                if attempt == self.retries:
+                    self.lost += len(batch)
+                    logger.exception("giving up on vote batch", extra={"votes": len(batch), "attempts": attempt + 1})
+                    return None
+                self.retried += 1
+                logger.warning("vote batch failed, retrying", extra={"votes": len(batch), "retry_in": delay, "error": str(e)})
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5)
+
+    async def _commit(self, batch: List[PendingVote]):
+        rows = [(vote.poll_id, vote.voter_ip, vote.option, vote.voter_username) for vote in batch]
+        async with open_async_session() as db:
+            result = await async_crud.apply_vote_batch(db, rows)
+        self.flushed += len(batch)
+        return result
+
+    async def _broadcast(self, tallies, changes):
+        for poll_id, (version, votes) in tallies.items():
+            await manager.broadcast_vote_update(poll_id, votes.model_dump(), version)
+        for poll_id, poll_changes in changes.items():
+            await manager.broadcast_voters_delta(poll_id, poll_changes)
+
+vote_ingestor = VoteIngestor()
+
+metrics.gauge_callback("vote_queue_depth", "Votes waiting for a write-behind batch",
+                       lambda: vote_ingestor.queue.qsize() if vote_ingestor.queue is not None else 0)
+metrics.gauge_callback("vote_queue_rejected_total", "Votes refused because the write-behind queue was full",
+                       lambda: vote_ingestor.rejected, kind="counter")
+metrics.gauge_callback("vote_batch_retries_total", "Write-behind batch commits retried after a failure",
+                       lambda: vote_ingestor.retried, kind="counter")
+metrics.gauge_callback("votes_lost_total", "Acknowledged write-behind votes given up after every retry failed",
+                       lambda: vote_ingestor.lost, kind="counter")
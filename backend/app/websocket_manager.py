@@ -1,69 +1,649 @@
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict
+from fastapi import WebSocket
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from app.backplane import Backplane, EventHandler, InProcessBackplane, create_backplane
+from app.frames import ENCODINGS, JSON_ENCODING, BINARY_ENCODING, Frame, encode_json, encoding_stats
+from app import metrics
 import json
 import asyncio
+import logging
+import os
+import secrets
+import time
+
+# Slow consumer policies applied when a connection's outbound queue is full
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+
+# Outbound queue settings for each connection
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", COALESCE)
+
+# Subscription topics
+FEED_TOPIC = "feed"
+ALL_TOPICS = "*"
+MAX_TOPICS_PER_CONNECTION = int(os.getenv("WS_MAX_TOPICS_PER_CONNECTION", "500"))
+
+# How long a disconnected session's subscriptions are kept for a reconnect
+SESSION_TTL_SECONDS = int(os.getenv("WS_SESSION_TTL_SECONDS", "120"))
+MAX_DETACHED_SESSIONS = int(os.getenv("WS_MAX_DETACHED_SESSIONS", "10000"))
+
+# Heartbeat: a ping every interval, connections silent for interval + timeout are reaped
+PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", "20"))
+PING_TIMEOUT_SECONDS = float(os.getenv("WS_PING_TIMEOUT_SECONDS", "20"))
+# Reap connections that answer pings but send nothing else for this long, 0 keeps them
+IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "0"))
+MAX_CONNECTIONS_PER_IP = int(os.getenv("WS_MAX_CONNECTIONS_PER_IP", "50"))
+
+# Window for merging vote_update bursts per poll, 0 sends every update
+VOTE_COALESCE_MS = int(os.getenv("WS_VOTE_COALESCE_MS", "50"))
+
+# Recent events kept per topic for clients resuming after a reconnect
+REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "256"))
+MAX_REPLAY_TOPICS = int(os.getenv("WS_MAX_REPLAY_TOPICS", "10000"))
+
+# Builds the current state of a topic for a client too far behind to replay, None means refetch
+SnapshotProvider = Callable[[str], Awaitable[Optional[dict]]]
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_RECIPIENTS = metrics.histogram("ws_broadcast_recipients", "Local sockets an event was queued on", buckets=metrics.SIZE_BUCKETS)
+BROADCAST_SECONDS = metrics.histogram("ws_broadcast_seconds", "Time to encode an event and queue it on every recipient")
+SEND_FAILURES = metrics.counter("ws_send_failures_total", "Sends that failed and closed the connection")
+QUEUE_DROPPED = metrics.counter("ws_queue_dropped_total", "Frames dropped or replaced because a send queue was full")
+SLOW_CONSUMERS = metrics.counter("ws_slow_consumer_disconnects_total", "Connections closed for not keeping up with their queue")
+
+def poll_topic(poll_id: int) -> str:
+    """Topic carrying vote and like updates for one poll"""
+    return f"poll:{poll_id}"
+
+def voters_topic(poll_id: int) -> str:
+    """Topic carrying voter list deltas for one poll"""
+    return f"voters:{poll_id}"
+
+def user_topic(username: str) -> str:
+    """Topic carrying like count updates for one user"""
+    return f"user:{username}"
+
+def is_valid_topic(topic) -> bool:
+    if not isinstance(topic, str):
+        return False
+    if topic in (FEED_TOPIC, ALL_TOPICS):
+        return True
+    if topic.startswith("poll:"):
+        return topic[5:].isdigit()
+    if topic.startswith("voters:"):
+        return topic[7:].isdigit()
+    if topic.startswith("user:"):
+        return 0 < len(topic) - 5 <= 100
+    return False
+
+class ClientConnection:
+    """A connected socket with its own bounded outbound queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int, policy: str):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.queue: Deque[Frame] = deque()
+        self.wakeup = asyncio.Event()
+        self.writer_task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.topics: Set[str] = set()
+        # Until the client subscribes explicitly it receives everything
+        self.explicit_subscriptions = False
+        self.session_id: Optional[str] = None
+        # Wire encoding negotiated with hello
+        self.encoding = JSON_ENCODING
+        self.client_ip = websocket.client.host if websocket.client else None
+        # Any inbound message proves the connection alive, pongs don't count as activity
+        self.last_seen = self.last_active = time.monotonic()
+
+    def enqueue(self, frame: Frame) -> bool:
+        """Queue a frame, returns False if the consumer should be disconnected"""
+        if len(self.queue) >= self.max_queue:
+            if self.policy == DISCONNECT:
+                return False
+            if self.policy == COALESCE and frame.key is not None:
+                # Replace the queued frame for the same key, if any
+                QUEUE_DROPPED.inc()
+                for index, queued in enumerate(self.queue):
+                    if queued.key == frame.key:
+                        del self.queue[index]
+                        break
+                else:
+                    self.queue.popleft()
+            else:
+                QUEUE_DROPPED.inc()
+                self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(frame)
+        self.wakeup.set()
+        return True
+
+    async def run_writer(self, on_failure):
+        """Drain the queue onto the socket until cancelled or a send fails"""
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while self.queue:
+                    # Send the frame's prebuilt message, skipping per-socket re-encoding
+                    message = self.queue.popleft().message_for(self.encoding)
+                    await self.websocket.send(message)
+                    if "bytes" in message:
+                        encoding_stats.record_send(BINARY_ENCODING, len(message["bytes"]))
+                    else:
+                        encoding_stats.record_send(JSON_ENCODING, len(message["text"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            SEND_FAILURES.inc()
+            logger.debug("send failed", extra={"client_ip": self.client_ip, "error": str(e)})
+            on_failure(self.websocket)
+
+class ReplayLog:
+    """Ring buffer of the latest frames published to one topic"""
+
+    def __init__(self, size: int, floor: int):
+        self.frames: Deque[Tuple[int, Frame]] = deque(maxlen=size)
+        # Highest sequence number this log no longer holds
+        self.floor = floor
+
+    def append(self, seq: int, frame: Frame):
+        if len(self.frames) == self.frames.maxlen:
+            self.floor = self.frames[0][0]
+        self.frames.append((seq, frame))
+
+    def covers(self, last_seq: int) -> bool:
+        """Whether every event after last_seq is still buffered"""
+        return last_seq >= self.floor
+
+    def since(self, last_seq: int) -> List[Tuple[int, Frame]]:
+        return [(seq, frame) for seq, frame in self.frames if seq > last_seq]
+
+class VoteUpdateCoalescer:
+    """Merges vote_update bursts per poll and publishes the latest tally once per window"""
+
+    def __init__(self, manager: "ConnectionManager", window_ms: int):
+        self.manager = manager
+        self.window = window_ms / 1000
+        # poll_id -> (tally version, votes)
+        self.pending: Dict[int, Tuple[Optional[int], dict]] = {}
+        self.timers: Dict[int, asyncio.TimerHandle] = {}
+        # Highest tally version published per poll
+        self.published: Dict[int, int] = {}
+
+    def submit(self, poll_id: int, votes: dict, version: Optional[int] = None):
+        """Record a tally for a poll, publishing it when the window closes.
+
+        A tally read before a concurrent commit can arrive after the newer one,
+        so tallies older than one already pending or published are dropped.
+        Tallies without a version (polls without a tally row) always replace.
+        """
+        if version is not None:
+            pending_version = self.pending.get(poll_id, (None, None))[0]
+            newest = max(self.published.get(poll_id, -1), -1 if pending_version is None else pending_version)
+            if version < newest:
+                return
+        self.pending[poll_id] = (version, votes)
+        if self.window <= 0:
+            self.flush(poll_id)
+        elif poll_id not in self.timers:
+            loop = asyncio.get_running_loop()
+            self.timers[poll_id] = loop.call_later(self.window, self.flush, poll_id)
+
+    def flush(self, poll_id: int):
+        """Publish the pending tally for a poll"""
+        self.timers.pop(poll_id, None)
+        pending = self.pending.pop(poll_id, None)
+        if pending is None:
+            return
+        version, votes = pending
+        if version is not None:
+            self.published[poll_id] = version
+        topics = [poll_topic(poll_id)]
+        message = {
+            "type": "vote_update",
+            "poll_id": poll_id,
+            "topics": topics,
+            "data": {"votes": votes}
+        }
+        # Only the latest tally matters to a slow consumer
+        self.manager._publish(topics, message, f"vote_update:{poll_id}")
+
+    def forget(self, poll_id: int):
+        """Drop pending state for a deleted poll"""
+        timer = self.timers.pop(poll_id, None)
+        if timer is not None:
+            timer.cancel()
+        self.pending.pop(poll_id, None)
+        self.published.pop(poll_id, None)
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, max_queue: int = SEND_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY, vote_coalesce_ms: int = VOTE_COALESCE_MS,
+                 backplane: Optional[Backplane] = None):
+        if policy not in (DROP_OLDEST, COALESCE, DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
         self.connection_data: Dict[WebSocket, dict] = {}
+        self.topic_index: Dict[str, Set[WebSocket]] = {}
+        # Sessions let a reconnecting client get its subscriptions back
+        self.session_connections: Dict[str, WebSocket] = {}
+        self.detached_sessions: "OrderedDict[str, Tuple[Set[str], float]]" = OrderedDict()
+        self.connections_per_ip: Dict[str, int] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.reaped_dead = 0
+        self.reaped_idle = 0
+        self.rejected_per_ip = 0
+        # Every event gets the next number of this worker's stream, a new epoch means a restart
+        self.epoch = secrets.token_hex(4)
+        self.seq = 0
+        # Events published per topic, sent as topic_seq so a subscriber can spot dropped or merged frames
+        self.topic_seqs: Dict[str, int] = {}
+        self.replay_logs: "OrderedDict[str, ReplayLog]" = OrderedDict()
+        # Highest sequence number held by a replay log that was evicted
+        self.replay_floor = 0
+        # Snapshot builders keyed by topic prefix, e.g. "poll"
+        self.snapshot_providers: Dict[str, SnapshotProvider] = {}
+        self.replayed = 0
+        self.snapshots = 0
+        self.vote_coalescer = VoteUpdateCoalescer(self, vote_coalesce_ms)
+        self.backplane = backplane or InProcessBackplane()
+        # Notified of events published by other workers
+        self.remote_listeners: List[EventHandler] = []
+
+    async def start(self):
+        """Start receiving events from the other workers and the heartbeat"""
+        await self.backplane.start(self._receive_remote)
+        if PING_INTERVAL_SECONDS > 0:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        await self.backplane.stop()
 
-    async def connect(self, websocket: WebSocket):
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(PING_INTERVAL_SECONDS)
+            self.sweep()
+
+    def sweep(self):
+        """Reap dead and idle connections, then ping the rest"""
+        now = time.monotonic()
+        for websocket, connection in list(self.active_connections.items()):
+            if now - connection.last_seen > PING_INTERVAL_SECONDS + PING_TIMEOUT_SECONDS:
+                # Half-open or stalled: no pong within the timeout
+                self.reaped_dead += 1
+                self._drop(websocket, 1001)
+            elif IDLE_TIMEOUT_SECONDS and now - connection.last_active > IDLE_TIMEOUT_SECONDS:
+                self.reaped_idle += 1
+                self._drop(websocket, 1000)
+        # One frame serves every connection, a pending ping replaces an unsent one
+        self._enqueue_all(self.active_connections.keys(), Frame.from_payload({"type": "ping"}, "ping"))
+
+    def _receive_remote(self, topics: List[str], message: str, key: Optional[str]):
+        # Remote events join this worker's stream under a local sequence number
+        self._deliver(topics, json.loads(message), key)
+        for listener in self.remote_listeners:
+            listener(topics, message, key)
+
+    async def connect(self, websocket: WebSocket) -> bool:
+        """Accept a connection, returns False if its IP already has too many"""
+        client_ip = websocket.client.host if websocket.client else None
+        if client_ip is not None and self.connections_per_ip.get(client_ip, 0) >= MAX_CONNECTIONS_PER_IP:
+            self.rejected_per_ip += 1
+            # Closing before accept rejects the handshake with a 403
+            await websocket.close(code=1008)
+            return False
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = ClientConnection(websocket, self.max_queue, self.policy)
+        connection.writer_task = asyncio.create_task(connection.run_writer(self.disconnect))
+        self.active_connections[websocket] = connection
         self.connection_data[websocket] = {"connected_at": asyncio.get_event_loop().time()}
+        if client_ip is not None:
+            self.connections_per_ip[client_ip] = self.connections_per_ip.get(client_ip, 0) + 1
+        self._add_to_topic(connection, ALL_TOPICS)
+        return True
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        if websocket in self.connection_data:
-            del self.connection_data[websocket]
+        connection = self.active_connections.pop(websocket, None)
+        if connection is not None:
+            for topic in connection.topics:
+                self._discard_from_topic(websocket, topic)
+            if connection.writer_task is not asyncio.current_task():
+                connection.writer_task.cancel()
+            if connection.session_id is not None:
+                self._detach_session(connection)
+            if connection.client_ip is not None:
+                remaining = self.connections_per_ip.get(connection.client_ip, 1) - 1
+                if remaining > 0:
+                    self.connections_per_ip[connection.client_ip] = remaining
+                else:
+                    self.connections_per_ip.pop(connection.client_ip, None)
+        self.connection_data.pop(websocket, None)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        try:
-            await websocket.send_text(message)
-        except:
-            self.disconnect(websocket)
-
-    async def broadcast(self, message: str):
-        print(f"Broadcasting to {len(self.active_connections)} connections: {message}")
-        disconnected = []
-        for connection in self.active_connections:
+    def _detach_session(self, connection: ClientConnection):
+        """Keep a closed connection's subscriptions until its session expires"""
+        self.session_connections.pop(connection.session_id, None)
+        if connection.explicit_subscriptions:
+            self.detached_sessions[connection.session_id] = (set(connection.topics), time.monotonic() + SESSION_TTL_SECONDS)
+            self.detached_sessions.move_to_end(connection.session_id)
+            while len(self.detached_sessions) > MAX_DETACHED_SESSIONS:
+                self.detached_sessions.popitem(last=False)
+
+    def _expire_sessions(self):
+        now = time.monotonic()
+        while self.detached_sessions:
+            _, expires_at = next(iter(self.detached_sessions.values()))
+            if expires_at > now:
+                break
+            self.detached_sessions.popitem(last=False)
+
+    def resume_session(self, websocket: WebSocket, session_id: Optional[str] = None, encoding: Optional[str] = None) -> dict:
+        """Attach a connection to a session, restoring the subscriptions of a detached one"""
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return {"type": "error", "message": "Not connected"}
+        if encoding is not None:
+            if encoding not in ENCODINGS:
+                return {"type": "error", "message": f"Unknown encoding: {encoding}"}
+            connection.encoding = encoding
+        self._expire_sessions()
+        if connection.session_id is not None:
+            self.session_connections.pop(connection.session_id, None)
+
+        saved = self.detached_sessions.pop(session_id, None) if isinstance(session_id, str) else None
+        if saved is not None:
+            self.subscribe(websocket, sorted(saved[0]))
+        else:
+            # Unknown, expired or still attached elsewhere (a duplicated tab): start a new session
+            session_id = secrets.token_urlsafe(12)
+        connection.session_id = session_id
+        self.session_connections[session_id] = websocket
+        return {
+            "type": "welcome",
+            "session": session_id,
+            "resumed": saved is not None,
+            "topics": sorted(connection.topics),
+            "encoding": connection.encoding,
+            "epoch": self.epoch,
+            "seq": self.seq
+        }
+
+    async def catch_up(self, websocket: WebSocket, topics: List[str], epoch, last_seq) -> dict:
+        """Send a resuming connection the events it missed on topics, or a snapshot where the buffer can't"""
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return {"replayed": 0, "snapshots": 0}
+        resumable = epoch == self.epoch and isinstance(last_seq, int) and not isinstance(last_seq, bool)
+        if ALL_TOPICS in topics:
+            # An unsubscribed client missed every topic
+            topics = list(self.replay_logs) if resumable and last_seq >= self.replay_floor else [ALL_TOPICS]
+        missed: Dict[int, Frame] = {}
+        stale: List[str] = []
+        for topic in topics:
+            log = self.replay_logs.get(topic)
+            if not resumable or not (log.covers(last_seq) if log is not None else last_seq >= self.replay_floor):
+                stale.append(topic)
+            elif log is not None:
+                missed.update(log.since(last_seq))
+
+        # Replayed frames are queued before anything newer so the client sees them in order
+        for seq in sorted(missed):
+            if not connection.enqueue(missed[seq]):
+                self._drop_slow_consumer(websocket)
+                return {"replayed": 0, "snapshots": 0}
+        self.replayed += len(missed)
+        for topic in stale:
+            await self._send_snapshot(websocket, topic)
+        return {"replayed": len(missed), "snapshots": len(stale)}
+
+    async def _send_snapshot(self, websocket: WebSocket, topic: str):
+        # Taken before reading state, events after it may be newer than the snapshot
+        seq, topic_seq = self.seq, self.topic_seqs.get(topic, 0)
+        provider = self.snapshot_providers.get(topic.split(":", 1)[0])
+        data = None
+        if provider is not None:
             try:
-                await connection.send_text(message)
-                print(f"Message sent successfully to connection")
-            except Exception as e:
-                print(f"Failed to send message to connection: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
-
-    async def broadcast_poll_update(self, poll_id: int, update_type: str, data: dict):
-        """Broadcast poll updates to all connected clients"""
+                data = await provider(topic)
+            except Exception:
+                logger.exception("failed to build snapshot", extra={"topic": topic})
+        self.snapshots += 1
+        message = {"type": "snapshot", "topic": topic, "topics": [topic], "seq": seq,
+                   "topic_seq": {topic: topic_seq}, "data": data}
+        await self.send_personal_message(encode_json(message), websocket)
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.active_connections),
+            "topics": len(self.topic_index),
+            "sessions": len(self.session_connections),
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "replay_topics": len(self.replay_logs),
+            "replayed": self.replayed,
+            "snapshots": self.snapshots,
+            "detached_sessions": len(self.detached_sessions),
+            "client_ips": len(self.connections_per_ip),
+            "reaped_dead": self.reaped_dead,
+            "reaped_idle": self.reaped_idle,
+            "rejected_per_ip": self.rejected_per_ip,
+            "encodings": encoding_stats.stats()
+        }
+
+    def _add_to_topic(self, connection: ClientConnection, topic: str):
+        connection.topics.add(topic)
+        self.topic_index.setdefault(topic, set()).add(connection.websocket)
+
+    def _discard_from_topic(self, websocket: WebSocket, topic: str):
+        subscribers = self.topic_index.get(topic)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.topic_index[topic]
+
+    def subscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """Subscribe a connection to topics, returns its current topics"""
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return []
+        if not connection.explicit_subscriptions:
+            connection.explicit_subscriptions = True
+            connection.topics.discard(ALL_TOPICS)
+            self._discard_from_topic(websocket, ALL_TOPICS)
+        for topic in topics:
+            if len(connection.topics) >= MAX_TOPICS_PER_CONNECTION:
+                break
+            self._add_to_topic(connection, topic)
+        return sorted(connection.topics)
+
+    def unsubscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """Unsubscribe a connection from topics, returns its current topics"""
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return []
+        for topic in topics:
+            connection.topics.discard(topic)
+            self._discard_from_topic(websocket, topic)
+        return sorted(connection.topics)
+
+    async def handle_message(self, websocket: WebSocket, data: str):
+        """Handle a hello, pong or subscribe/unsubscribe request sent by a client"""
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.last_seen = time.monotonic()
+        try:
+            request = json.loads(data)
+            action = request["action"]
+            topics = request.get("topics", [])
+        except (ValueError, TypeError, KeyError, AttributeError):
+            await self.send_personal_message(encode_json({"type": "error", "message": "Invalid message"}), websocket)
+            return
+
+        if action == "pong":
+            return
+        if connection is not None:
+            connection.last_active = connection.last_seen
+
+        if action == "hello":
+            reply = self.resume_session(websocket, request.get("session"), request.get("encoding"))
+            await self.send_personal_message(encode_json(reply), websocket)
+            if reply["type"] == "welcome" and "last_seq" in request:
+                await self.catch_up(websocket, reply["topics"], request.get("epoch"), request["last_seq"])
+            return
+
+        if action not in ("subscribe", "unsubscribe") or not isinstance(topics, list):
+            await self.send_personal_message(encode_json({"type": "error", "message": f"Unknown action: {action}"}), websocket)
+            return
+
+        invalid = [topic for topic in topics if not is_valid_topic(topic)]
+        if invalid:
+            await self.send_personal_message(encode_json({"type": "error", "message": f"Invalid topics: {invalid}"}), websocket)
+            return
+
+        if action == "subscribe":
+            current = self.subscribe(websocket, topics)
+        else:
+            current = self.unsubscribe(websocket, topics)
+        await self.send_personal_message(encode_json({"type": "subscribed", "topics": current}), websocket)
+        if action == "subscribe" and "last_seq" in request:
+            # Topics the client followed before reconnecting to a worker without its session
+            await self.catch_up(websocket, [topic for topic in topics if topic in current], request.get("epoch"), request["last_seq"])
+
+    def _drop_slow_consumer(self, websocket: WebSocket):
+        """Disconnect a consumer that can't keep up with its queue"""
+        # 1013: try again later
+        SLOW_CONSUMERS.inc()
+        self._drop(websocket, 1013)
+
+    def _drop(self, websocket: WebSocket, code: int):
+        """Forget a connection now and close it in the background"""
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close(websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            # A half-open peer never acknowledges, don't wait on it forever
+            await asyncio.wait_for(websocket.close(code=code), PING_TIMEOUT_SECONDS or None)
+        except Exception:
+            pass
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        connection = self.active_connections.get(websocket)
+        if connection is not None and not connection.enqueue(Frame(message)):
+            self._drop_slow_consumer(websocket)
+
+    async def broadcast(self, message: str, key: Optional[str] = None):
+        """Queue a message on every connection without waiting for the sends"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("broadcast", extra={"recipients": len(self.active_connections), "key": key})
+        self._enqueue_all(self.active_connections.keys(), Frame(message, key))
+
+    async def publish(self, topics: List[str], message: dict, key: Optional[str] = None):
+        """Encode a message once and queue it on the subscribers of any of the topics"""
+        self._publish(topics, message, key)
+
+    def _publish(self, topics: List[str], message: dict, key: Optional[str] = None):
+        frame = self._deliver(topics, message, key)
+        self.backplane.publish(topics, frame.text, frame.key)
+
+    def _deliver(self, topics: List[str], message: dict, key: Optional[str] = None) -> Frame:
+        """Number an event, buffer it for replay and queue it on this worker's subscribers"""
+        start = time.perf_counter()
+        self.seq += 1
+        topic_seq = {}
+        for topic in topics:
+            topic_seq[topic] = self.topic_seqs[topic] = self.topic_seqs.get(topic, 0) + 1
+        frame = Frame.from_payload({**message, "seq": self.seq, "topic_seq": topic_seq}, key)
+        self._remember(topics, self.seq, frame)
+        sources = [self.topic_index.get(topic) for topic in (ALL_TOPICS, *topics)]
+        sources = [subscribers for subscribers in sources if subscribers]
+        # A single topic's subscriber set is used as is, only overlapping topics need a union
+        recipients = sources[0] if len(sources) == 1 else set().union(*sources)
+        count = len(recipients)
+        self._enqueue_all(recipients, frame)
+        BROADCAST_RECIPIENTS.observe(count)
+        BROADCAST_SECONDS.observe(time.perf_counter() - start)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("publish", extra={"topics": topics, "recipients": count, "seq": self.seq, "type": message.get("type")})
+        return frame
+
+    def _remember(self, topics: List[str], seq: int, frame: Frame):
+        if REPLAY_BUFFER_SIZE <= 0:
+            return
+        for topic in topics:
+            log = self.replay_logs.get(topic)
+            if log is None:
+                log = self.replay_logs[topic] = ReplayLog(REPLAY_BUFFER_SIZE, self.replay_floor)
+                if len(self.replay_logs) > MAX_REPLAY_TOPICS:
+                    # Clients behind the evicted log's last event can't be judged any more
+                    _, evicted = self.replay_logs.popitem(last=False)
+                    if evicted.frames:
+                        self.replay_floor = max(self.replay_floor, evicted.frames[-1][0])
+            else:
+                self.replay_logs.move_to_end(topic)
+            log.append(seq, frame)
+
+    def _enqueue_all(self, websockets, frame: Frame):
+        slow_consumers = [
+            websocket for websocket in websockets
+            if not self.active_connections[websocket].enqueue(frame)
+        ]
+        for websocket in slow_consumers:
+            self._drop_slow_consumer(websocket)
+
+    async def broadcast_poll_update(self, poll_id: int, update_type: str, data: dict, coalesce_key: Optional[str] = None, topics: Optional[List[str]] = None):
+        """Publish a poll update to the poll's subscribers"""
+        topics = topics or [poll_topic(poll_id)]
+        # Clients sharing one socket route messages to components by topic
         message = {
             "type": update_type,
             "poll_id": poll_id,
+            "topics": topics,
             "data": data
         }
-        await self.broadcast(json.dumps(message))
+        await self.publish(topics, message, coalesce_key)
 
-    async def broadcast_vote_update(self, poll_id: int, votes: dict):
-        """Broadcast vote updates"""
-        await self.broadcast_poll_update(poll_id, "vote_update", {"votes": votes})
+    async def broadcast_vote_update(self, poll_id: int, votes: dict, version: Optional[int] = None):
+        """Broadcast vote updates, merged per poll over the coalescing window, stale tally versions are dropped"""
+        self.vote_coalescer.submit(poll_id, votes, version)
+
+    async def broadcast_voters_delta(self, poll_id: int, changes: list):
+        """Broadcast voter list changes, never coalesced since clients apply every version"""
+        topics = [voters_topic(poll_id)]
+        message = {
+            "type": "voters_delta",
+            "poll_id": poll_id,
+            "topics": topics,
+            "data": {"changes": [change.model_dump(mode="json") for change in changes]}
+        }
+        await self.publish(topics, message)
 
     async def broadcast_like_update(self, poll_id: int, likes_count: int):
         """Broadcast like updates"""
-        await self.broadcast_poll_update(poll_id, "like_update", {"likes_count": likes_count})
+        await self.broadcast_poll_update(poll_id, "like_update", {"likes_count": likes_count}, f"like_update:{poll_id}")
 
     async def broadcast_poll_created(self, poll_id: int, poll_data: dict):
         """Broadcast new poll creation"""
-        await self.broadcast_poll_update(poll_id, "poll_created", poll_data)
+        await self.broadcast_poll_update(poll_id, "poll_created", poll_data, topics=[FEED_TOPIC])
+
+    async def broadcast_poll_deleted(self, poll_id: int):
+        """Broadcast poll deletion to the feed and the poll's subscribers"""
+        self.vote_coalescer.forget(poll_id)
+        await self.broadcast_poll_update(poll_id, "poll_deleted", {"poll_id": poll_id}, topics=[FEED_TOPIC, poll_topic(poll_id), voters_topic(poll_id)])
 
     async def broadcast_user_like_update(self, username: str, likes_count: int):
         """Broadcast user like updates"""
-        await self.broadcast_poll_update(0, "user_like_update", {"username": username, "likes_count": likes_count})
+        await self.broadcast_poll_update(0, "user_like_update", {"username": username, "likes_count": likes_count}, f"user_like_update:{username}", [user_topic(username)])
 
     async def broadcast_like_toggle_update(self, poll_id: int, liker_username: str, liked_username: str, is_liked: bool):
         """Broadcast like toggle updates for a specific poll"""
@@ -73,4 +653,21 @@ class ConnectionManager:
             "is_liked": is_liked
         })
 
-manager = ConnectionManager()
+manager = ConnectionManager(backplane=create_backplane())
+
+def _queue_depths() -> dict:
+    depths = [len(connection.queue) for connection in list(manager.active_connections.values())]
+    return {("max",): max(depths, default=0), ("total",): sum(depths)}
+
+metrics.gauge_callback("ws_connections", "Open WebSocket connections", lambda: len(manager.active_connections))
+metrics.gauge_callback("ws_topics", "Topics with at least one local subscriber", lambda: len(manager.topic_index))
+metrics.gauge_callback("ws_send_queue_depth", "Frames waiting in send queues", _queue_depths, ["stat"])
+metrics.gauge_callback("ws_reaped_total", "Connections closed by the heartbeat", lambda: {
+    ("dead",): manager.reaped_dead, ("idle",): manager.reaped_idle
+}, ["reason"], kind="counter")
+metrics.gauge_callback("ws_rejected_total", "Handshakes rejected by the per-IP cap", lambda: manager.rejected_per_ip, kind="counter")
+metrics.gauge_callback("ws_replayed_total", "Events replayed to resuming clients", lambda: manager.replayed, kind="counter")
+metrics.gauge_callback("ws_snapshots_total", "Snapshots sent to clients too far behind to replay", lambda: manager.snapshots, kind="counter")
+metrics.gauge_callback("ws_messages_sent_total", "Messages sent by wire encoding", lambda: {
+    (mode,): counters["messages"] for mode, counters in encoding_stats.stats().items()
+}, ["encoding"], kind="counter")
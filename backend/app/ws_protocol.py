@@ -0,0 +1,62 @@
+"""Uvicorn WebSocket protocol with tunable permessage-deflate.
+
+Uvicorn always offers permessage-deflate with fixed settings. This protocol
+takes its settings from the environment and records compressed bytes and
+CPU per message in the encoding stats. Run uvicorn with
+`--ws app.ws_protocol:DeflateWebSocketProtocol`.
+"""
+import os
+import time
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import OP_BINARY, OP_TEXT
+from app.frames import encoding_stats
+
+# Offer permessage-deflate to clients that ask for it
+WS_DEFLATE = os.getenv("WS_DEFLATE", "true").lower() in ("1", "true", "yes")
+# zlib level (1 fastest, 9 smallest) and memory level
+WS_DEFLATE_LEVEL = int(os.getenv("WS_DEFLATE_LEVEL", "6"))
+WS_DEFLATE_MEM_LEVEL = int(os.getenv("WS_DEFLATE_MEM_LEVEL", "5"))
+# Compression window, 8-15 bits, smaller saves memory per connection
+WS_DEFLATE_WINDOW_BITS = int(os.getenv("WS_DEFLATE_WINDOW_BITS", "15"))
+# Keep the compression context between messages, better ratio but a window per connection
+WS_DEFLATE_CONTEXT_TAKEOVER = os.getenv("WS_DEFLATE_CONTEXT_TAKEOVER", "true").lower() in ("1", "true", "yes")
+
+DEFLATE_MODE = "permessage_deflate"
+
+class MeasuredPerMessageDeflate(PerMessageDeflate):
+    """permessage-deflate that records bytes and CPU per outgoing message"""
+
+    def encode(self, frame):
+        start = time.perf_counter_ns()
+        encoded = super().encode(frame)
+        if frame.opcode in (OP_TEXT, OP_BINARY):
+            encoding_stats.record_encode(DEFLATE_MODE, time.perf_counter_ns() - start)
+            encoding_stats.record_send(DEFLATE_MODE, len(encoded.data), len(frame.data))
+        return encoded
+
+class MeasuredDeflateFactory(ServerPerMessageDeflateFactory):
+    def process_request_params(self, params, accepted_extensions):
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+        return response_params, MeasuredPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings
+        )
+
+def deflate_factory() -> MeasuredDeflateFactory:
+    """permessage-deflate offer built from the WS_DEFLATE_* settings"""
+    return MeasuredDeflateFactory(
+        server_no_context_takeover=not WS_DEFLATE_CONTEXT_TAKEOVER,
+        server_max_window_bits=WS_DEFLATE_WINDOW_BITS,
+        compress_settings={"level": WS_DEFLATE_LEVEL, "memLevel": WS_DEFLATE_MEM_LEVEL}
+    )
+
+class DeflateWebSocketProtocol(WebSocketProtocol):
+    """Uvicorn's websockets protocol with the tuned permessage-deflate offer"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.available_extensions = [deflate_factory()] if WS_DEFLATE and self.config.ws_per_message_deflate else []
@@ -0,0 +1,108 @@
+"""Per-broadcast CPU cost against subscriber count.
+
+Connects N Starlette WebSockets over an in-memory ASGI transport, subscribes
+them all to one poll and publishes vote updates through ConnectionManager,
+waiting for every writer to drain. Compares the shared pre-encoded frame
+path with sending text per socket, and orjson with stdlib json.
+
+    cd backend && python -m benchmarks.bench_broadcast --subscribers 100 1000 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+from starlette.websockets import WebSocket
+from app import frames
+from app.backplane import InProcessBackplane
+from app.websocket_manager import ClientConnection, ConnectionManager
+
+class NullTransport:
+    """ASGI receive/send pair that accepts the socket and discards outbound frames"""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.target = 0
+        self.done = asyncio.Event()
+
+    async def receive(self):
+        return {"type": "websocket.connect"}
+
+    async def send(self, message):
+        if message["type"] == "websocket.send":
+            self.frames += 1
+            self.bytes += len(message["text"])
+            if self.frames == self.target:
+                self.done.set()
+
+def send_text_writer(connection: ClientConnection):
+    """The writer as it was before shared frames: send_text per socket"""
+    async def run_writer(on_failure):
+        while True:
+            await connection.wakeup.wait()
+            connection.wakeup.clear()
+            while connection.queue:
+                await connection.websocket.send_text(connection.queue.popleft().text)
+    return run_writer
+
+async def run(subscribers: int, broadcasts: int, mode: str) -> dict:
+    manager = ConnectionManager(max_queue=broadcasts + 10, vote_coalesce_ms=0, backplane=InProcessBackplane())
+    transport = NullTransport()
+    for _ in range(subscribers):
+        websocket = WebSocket({"type": "websocket", "path": "/ws", "headers": []}, transport.receive, transport.send)
+        await manager.connect(websocket)
+        manager.subscribe(websocket, ["poll:1"])
+    if mode == "send_text":
+        for connection in manager.active_connections.values():
+            connection.writer_task.cancel()
+            connection.writer_task = asyncio.create_task(send_text_writer(connection)(manager.disconnect))
+    await asyncio.sleep(0)
+
+    expected = subscribers * broadcasts
+    start_cpu, start_wall = time.process_time(), time.perf_counter()
+    for index in range(broadcasts):
+        transport.target = subscribers * (index + 1)
+        transport.done.clear()
+        await manager.broadcast_vote_update(1, {"option1": index, "option2": 2 * index, "option3": 7, "option4": 0})
+        await transport.done.wait()
+    cpu, wall = time.process_time() - start_cpu, time.perf_counter() - start_wall
+
+    for connection in manager.active_connections.values():
+        connection.writer_task.cancel()
+    await asyncio.sleep(0)
+    return {
+        "mode": mode,
+        "encoder": frames.JSON_ENCODER,
+        "subscribers": subscribers,
+        "broadcasts": broadcasts,
+        "cpu_ms_per_broadcast": round(cpu / broadcasts * 1000, 3),
+        "cpu_us_per_send": round(cpu / expected * 1e6, 3),
+        "wall_ms_per_broadcast": round(wall / broadcasts * 1000, 3),
+        "bytes_per_message": transport.bytes // expected
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", default=["frame", "send_text"], choices=["frame", "send_text"])
+    parser.add_argument("--encoders", nargs="+", default=["orjson", "json"], choices=["orjson", "json"])
+    args = parser.parse_args()
+
+    installed = frames.orjson
+    results = []
+    for encoder in args.encoders:
+        if encoder == "orjson" and installed is None:
+            print("orjson is not installed, skipping")
+            continue
+        frames.orjson = installed if encoder == "orjson" else None
+        frames.JSON_ENCODER = encoder
+        for subscribers in args.subscribers:
+            for mode in args.modes:
+                result = asyncio.run(run(subscribers, args.broadcasts, mode))
+                results.append(result)
+                print(json.dumps(result))
+    frames.orjson = installed
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Read/write concurrency of the SQLite storage profiles.
+
+Serves the app with uvicorn from a child process against a fresh temporary
+database once per SQLITE_PROFILE, since settings are read when the app is
+imported, and keeps the load generator out of the server's interpreter.
+After seeding a set of polls, W writers vote from new voters on
+POST /polls/{id}/vote while R readers fetch GET /polls/ and GET /polls/{id},
+for a fixed time per mix. Requests shed by admission control (429/503) are
+counted apart and retried after --backoff seconds, as a client honouring
+Retry-After would. Reports operations per second and latency percentiles
+for each side as one JSON line per profile and mix.
+
+    cd backend && python -m benchmarks.bench_storage --profiles default wal --mixes 16:0 0:16 16:16
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+from benchmarks.bench_votes import http_request, percentile, serving_app
+
+def ms(value):
+    return round(value * 1000, 3) if value is not None else None
+
+def latency_summary(samples: List[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50": ms(percentile(samples, 0.5)),
+        "p99": ms(percentile(samples, 0.99)),
+        "max": ms(samples[-1] if samples else None)
+    }
+
+async def seed(port: int, polls: int) -> List[int]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    poll_ids = []
+    for index in range(polls):
+        _, body = await http_request(reader, writer, "POST", "/polls/", {
+            "title": f"storage {index}", "option1": "a", "option2": "b", "option3": "c", "option4": "d"
+        })
+        poll_ids.append(json.loads(body)["id"])
+    writer.close()
+    return poll_ids
+
+async def run(port: int, profile: str, poll_ids: List[int], writers: int, readers: int, duration: float, usernames,
+              backoff: float = 1.0) -> dict:
+    vote_latencies: List[float] = []
+    read_latencies: List[float] = []
+    errors = 0
+    shed = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(requests, latencies):
+        nonlocal errors, shed
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while time.perf_counter() < deadline:
+            method, path, body = requests()
+            started = time.perf_counter()
+            try:
+                status, _ = await http_request(reader, writer, method, path, body)
+            except (IndexError, ConnectionError, asyncio.IncompleteReadError):
+                # uvicorn drops the connection after an unhandled error, e.g. "database is locked"
+                status = None
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            if status in (429, 503):
+                shed += 1
+                await asyncio.sleep(backoff)
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+        writer.close()
+
+    def vote() -> Tuple[str, str, dict]:
+        return "POST", f"/polls/{random.choice(poll_ids)}/vote", {
+            "option": random.randint(1, 4), "voter_username": next(usernames)
+        }
+
+    def read() -> Tuple[str, str, None]:
+        if random.random() < 0.5:
+            return "GET", "/polls/?limit=20", None
+        return "GET", f"/polls/{random.choice(poll_ids)}", None
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(worker(vote, vote_latencies) for _ in range(writers)),
+        *(worker(read, read_latencies) for _ in range(readers))
+    )
+    elapsed = time.perf_counter() - started
+
+    return {
+        "profile": profile,
+        "writers": writers,
+        "readers": readers,
+        "errors": errors,
+        "shed": shed,
+        "votes_per_second": round(len(vote_latencies) / elapsed, 1),
+        "reads_per_second": round(len(read_latencies) / elapsed, 1),
+        "vote_latency_ms": latency_summary(vote_latencies),
+        "read_latency_ms": latency_summary(read_latencies)
+    }
+
+async def serve():
+    """Child process: serve until stdin closes, announcing the port on stdout"""
+    async with serving_app() as port:
+        print(port, flush=True)
+        await asyncio.get_running_loop().run_in_executor(None, sys.stdin.read)
+
+async def run_profile(port: int, profile: str, args) -> List[dict]:
+    usernames = (f"storage{index}" for index in itertools.count())
+    poll_ids = await seed(port, args.polls)
+    results = []
+    for mix in args.mixes:
+        writers, readers = (int(count) for count in mix.split(":"))
+        result = await run(port, profile, poll_ids, writers, readers, args.duration, usernames, args.backoff)
+        results.append(result)
+        print(json.dumps(result), flush=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["default", "wal"], help="SQLITE_PROFILE values to compare")
+    parser.add_argument("--mixes", nargs="+", default=["16:0", "0:16", "16:16"], help="writers:readers")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per mix")
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--backoff", type=float, default=1.0, help="Seconds to wait after a 429 or 503")
+    parser.add_argument("--output", help="Also write the results to this file as a JSON array")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve())
+        return
+
+    results = []
+    for profile in args.profiles:
+        database = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        database.close()
+        env = {**os.environ, "SQLITE_PROFILE": profile, "DATABASE_URL": f"sqlite:///{database.name}"}
+        server = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_storage", "--serve"],
+                                  env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            port = int(server.stdout.readline())
+            results += asyncio.run(run_profile(port, profile, args))
+        finally:
+            server.stdin.close()
+            server.wait()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(database.name + suffix):
+                    os.unlink(database.name + suffix)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Vote-to-delivery latency under load.
+
+Starts the app in-process with uvicorn against a temporary SQLite database,
+opens N WebSocket clients subscribed to one poll and drives M concurrent
+voters against POST /polls/{id}/vote, every vote from a new voter. Reports
+vote->vote_update delivery latency percentiles, votes/s, messages/s and
+memory per connection as one JSON line per run, for tracking regressions.
+
+Settings are read from the environment as usual, for example
+VOTE_INGEST_MODE=write_behind or WS_VOTE_COALESCE_MS=0.
+
+    cd backend && python -m benchmarks.bench_votes --clients 10 100 1000 --voters 20 --votes 2000
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+def rss_bytes() -> Optional[int]:
+    """Resident memory of this process, None where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+async def http_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, bytes]:
+    """One request on a keep-alive HTTP/1.1 connection"""
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+    )
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+class Subscriber:
+    """A WebSocket client recording when each vote_update arrives"""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.task: Optional[asyncio.Task] = None
+        # (arrival, total votes) for every vote_update, totals only grow since every voter is new
+        self.updates: List[Tuple[float, int]] = []
+        # Voter username -> version of the change that added it, the tally total right after the vote
+        self.versions: Dict[str, int] = {}
+        self.messages = 0
+        self.target = 0
+        self.done = asyncio.Event()
+
+    async def run(self):
+        async for raw in self.websocket:
+            arrived = time.perf_counter()
+            message = json.loads(raw)
+            if message["type"] == "ping":
+                await self.websocket.send(json.dumps({"action": "pong"}))
+                continue
+            self.messages += 1
+            if message["type"] == "vote_update":
+                total = sum(message["data"]["votes"].values())
+                self.updates.append((arrived, total))
+                if self.target and total >= self.target:
+                    self.done.set()
+            elif message["type"] == "voters_delta":
+                for change in message["data"]["changes"]:
+                    if change["kind"] == "added":
+                        self.versions[change["username"]] = change["version"]
+
+    def latencies(self, sent: Dict[str, float], versions: Dict[str, int]) -> List[float]:
+        """Seconds from sending each vote to the first update that includes it"""
+        totals = [total for _, total in self.updates]
+        result = []
+        for username, started in sent.items():
+            version = versions.get(username)
+            if version is None:
+                continue
+            index = bisect.bisect_left(totals, version)
+            if index < len(totals):
+                result.append(self.updates[index][0] - started)
+        return result
+
+async def run(base_url: str, ws_url: str, clients: int, voters: int, votes: int) -> dict:
+    import websockets
+
+    host, port = base_url.split("//")[1].split(":")
+    reader, writer = await asyncio.open_connection(host, int(port))
+    status, body = await http_request(reader, writer, "POST", "/polls/", {
+        "title": f"bench {clients}x{voters}", "option1": "a", "option2": "b", "option3": "c", "option4": "d"
+    })
+    writer.close()
+    poll_id = json.loads(body)["id"]
+
+    async def open_subscriber(topics: List[str]) -> Subscriber:
+        websocket = await websockets.connect(ws_url, max_queue=None)
+        await websocket.send(json.dumps({"action": "subscribe", "topics": topics}))
+        json.loads(await websocket.recv())
+        subscriber = Subscriber(websocket)
+        subscriber.task = asyncio.create_task(subscriber.run())
+        return subscriber
+
+    rss_before = rss_bytes()
+    subscribers = []
+    for start in range(0, clients, 100):
+        subscribers += await asyncio.gather(*(
+            open_subscriber([f"poll:{poll_id}"]) for _ in range(start, min(clients, start + 100))
+        ))
+    await asyncio.sleep(0.2)
+    rss_after = rss_bytes()
+    # Learns which tally total each vote produced, whatever order the votes committed in
+    observer = await open_subscriber([f"voters:{poll_id}"])
+
+    sent: Dict[str, float] = {}
+    errors = 0
+    counter = iter(range(votes))
+
+    async def voter(worker: int):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, int(port))
+        for index in counter:
+            username = f"bench{index}"
+            sent[username] = time.perf_counter()
+            status, _ = await http_request(reader, writer, "POST", f"/polls/{poll_id}/vote", {
+                "option": index % 4 + 1, "voter_username": username
+            })
+            if status != 200:
+                errors += 1
+                del sent[username]
+        writer.close()
+
+    for subscriber in subscribers:
+        subscriber.target = votes
+    start = time.perf_counter()
+    await asyncio.gather(*(voter(worker) for worker in range(voters)))
+    voting = time.perf_counter() - start
+    try:
+        await asyncio.wait_for(asyncio.gather(*(subscriber.done.wait() for subscriber in subscribers)), 30)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(
+        latency for subscriber in subscribers
+        for latency in subscriber.latencies(sent, observer.versions)
+    )
+    messages = sum(subscriber.messages for subscriber in subscribers)
+    for subscriber in subscribers + [observer]:
+        subscriber.task.cancel()
+        await subscriber.websocket.close()
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    # The mode the app actually runs in, an unknown VOTE_INGEST_MODE falls back to direct
+    from app.vote_ingest import vote_ingestor
+
+    return {
+        "clients": clients,
+        "voters": voters,
+        "votes": votes,
+        "errors": errors,
+        "ingest_mode": "write_behind" if vote_ingestor.enabled else "direct",
+        "vote_coalesce_ms": int(os.getenv("WS_VOTE_COALESCE_MS", "50")),
+        "votes_per_second": round((votes - errors) / voting, 1),
+        "messages_per_second": round(messages / elapsed, 1),
+        "deliveries": len(latencies),
+        "missed_deliveries": len(sent) * clients - len(latencies),
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 0.5)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "p999": ms(percentile(latencies, 0.999)),
+            "max": ms(latencies[-1] if latencies else None)
+        },
+        # Both ends of every connection live in this process
+        "rss_kb_per_connection": round((rss_after - rss_before) / clients / 1024, 1) if rss_before and clients else None
+    }
+
+@contextlib.asynccontextmanager
+async def serving_app(port: int = 0):
+    """Run the app with uvicorn in this process, yields the port it listens on"""
+    import uvicorn
+    from app.main import app
+    from app.ws_protocol import DeflateWebSocketProtocol
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                            ws=DeflateWebSocketProtocol, backlog=4096)
+    server = uvicorn.Server(config)
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        yield server.servers[0].sockets[0].getsockname()[1]
+    finally:
+        server.should_exit = True
+        await serving
+
+async def run_all(args) -> List[dict]:
+    results = []
+    async with serving_app(args.port) as port:
+        for clients in args.clients:
+            result = await run(f"http://127.0.0.1:{port}", f"ws://127.0.0.1:{port}/ws", clients, args.voters, args.votes)
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--voters", type=int, default=20, help="Concurrent voters")
+    parser.add_argument("--votes", type=int, default=2000, help="Votes per run, each from a new voter")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--output", help="Also write the results to this file as a JSON array")
+    args = parser.parse_args()
+
+    # Settings are read when the app is imported
+    database = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    database.close()
+    os.environ["DATABASE_URL"] = f"sqlite:///{database.name}"
+    os.environ.setdefault("WS_MAX_CONNECTIONS_PER_IP", str(max(args.clients) + 10))
+    try:
+        results = asyncio.run(run_all(args))
+    finally:
+        os.unlink(database.name)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+if __name__ == "__main__":
+    main()
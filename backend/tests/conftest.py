@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+# Before the app is imported, its engines are created from this
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "polls.db")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def create_poll(client):
+    def create(title: str = "Poll", **options):
+        options = options or {"option1": "a", "option2": "b"}
+        response = client.post("/polls/", json={"title": title, **options})
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return create
@@ -0,0 +1,74 @@
+"""Per-key rate limits and load shedding of the write endpoints"""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.admission import AdmissionGate, TokenBuckets
+
+def test_token_bucket_allows_a_burst_then_waits():
+    buckets = TokenBuckets(rate=1, burst=2)
+    assert buckets.take("alice") == 0
+    assert buckets.take("alice") == 0
+    assert 0 < buckets.take("alice") <= 1
+    # Keys have their own buckets
+    assert buckets.take("bob") == 0
+
+def test_token_buckets_forget_the_least_recently_used_key():
+    buckets = TokenBuckets(rate=1, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        buckets.take(key)
+    assert len(buckets) == 2
+    assert buckets.take("a") == 0
+
+def test_zero_rate_disables_the_limit():
+    buckets = TokenBuckets(rate=0, burst=1)
+    assert all(buckets.take("alice") == 0 for _ in range(10))
+
+def test_saturated_gate_sheds_after_the_queue_target():
+    gate = AdmissionGate("test", max_in_flight=1, rate=0, burst=1, queue_target_ms=20, enabled=True)
+
+    async def scenario():
+        async with gate.admit():
+            with pytest.raises(HTTPException) as shed:
+                async with gate.admit():
+                    pass
+            assert shed.value.status_code == 503
+            assert shed.value.headers["Retry-After"] == "1"
+        # The slot is free again once the first request finishes
+        async with gate.admit():
+            pass
+
+    asyncio.run(scenario())
+    assert (gate.admitted, gate.overloaded, gate.in_flight) == (2, 1, 0)
+
+def test_waiting_request_gets_the_released_slot():
+    gate = AdmissionGate("test", max_in_flight=1, rate=0, burst=1, queue_target_ms=1000, enabled=True)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def request():
+            async with gate.admit():
+                await release.wait()
+
+        first = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        assert (gate.in_flight, len(gate._waiters)) == (1, 1)
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    assert (gate.admitted, gate.overloaded, gate.in_flight) == (2, 0, 0)
+
+def test_vote_over_the_rate_gets_429(client, create_poll):
+    poll_id = create_poll()
+    codes = [
+        client.post(f"/polls/{poll_id}/vote", json={"option": 1, "voter_username": "rate-limited"}).status_code
+        for _ in range(10)
+    ]
+    assert codes[0] == 200
+    assert 429 in codes
+    limited = client.post(f"/polls/{poll_id}/vote", json={"option": 1, "voter_username": "rate-limited"})
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
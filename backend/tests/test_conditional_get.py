@@ -0,0 +1,39 @@
+"""ETag revalidation of the poll reads"""
+
+def test_poll_not_modified_until_a_vote(client, create_poll):
+    poll_id = create_poll()
+    first = client.get(f"/polls/{poll_id}")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    cached = client.get(f"/polls/{poll_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert client.get(f"/polls/{poll_id}", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get(f"/polls/{poll_id}", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+
+    client.post(f"/polls/{poll_id}/vote", json={"option": 2, "voter_username": "etag-voter"})
+    changed = client.get(f"/polls/{poll_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["votes"]["option2"] == 1
+
+def test_missing_poll_is_never_not_modified(client):
+    assert client.get("/polls/999999").status_code == 404
+    assert client.get("/polls/999999", headers={"If-None-Match": "*"}).status_code == 404
+
+def test_deleted_poll_etag_no_longer_matches(client, create_poll):
+    poll_id = create_poll()
+    etag = client.get(f"/polls/{poll_id}").headers["etag"]
+    assert client.delete(f"/polls/{poll_id}").status_code == 200
+    assert client.get(f"/polls/{poll_id}", headers={"If-None-Match": etag}).status_code == 404
+
+def test_poll_list_changes_with_new_polls(client, create_poll):
+    etag = client.get("/polls/").headers["etag"]
+    assert client.get("/polls/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/polls/", headers={"If-None-Match": "*"}).status_code == 200
+
+    poll_id = create_poll("Newer poll")
+    changed = client.get("/polls/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert poll_id in [poll["id"] for poll in changed.json()["polls"]]
@@ -0,0 +1,45 @@
+"""Statement counts of the poll read endpoints, so an N+1 shows up as a failure"""
+import pytest
+from app.cache import response_cache, tally_cache
+from app.database import async_engine, async_read_engine, engine, read_engine
+from app.profiler import profile_engine, profile_queries
+
+POLLS = 10
+
+@pytest.fixture(scope="module")
+def poll_ids(client):
+    for profiled in {engine, read_engine, async_engine, async_read_engine} - {None}:
+        profile_engine(profiled)
+    ids = []
+    for i in range(POLLS):
+        poll = client.post("/polls/", json={"title": f"Poll {i}", "option1": "a", "option2": "b", "option3": "c"})
+        ids.append(poll.json()["id"])
+        client.post(f"/polls/{poll.json()['id']}/vote", json={"option": 1 + i % 3, "voter_username": f"voter{i}"})
+    return ids
+
+def profile_cold_and_warm(call):
+    """Profiles of a call with empty caches and of the same call repeated"""
+    tally_cache.clear()
+    response_cache.clear()
+    with profile_queries() as cold:
+        assert call().status_code == 200
+    with profile_queries() as warm:
+        assert call().status_code == 200
+    return cold, warm
+
+def test_list_polls(client, poll_ids):
+    cold, warm = profile_cold_and_warm(lambda: client.get("/polls/"))
+    # Polls and their tallies load together, not once per poll
+    assert cold.queries <= 2, cold.summary()
+    assert cold.max_repeats == 1, cold.summary()
+    assert warm.queries == 0, warm.summary()
+
+def test_get_poll(client, poll_ids):
+    cold, warm = profile_cold_and_warm(lambda: client.get(f"/polls/{poll_ids[0]}"))
+    assert cold.queries <= 2, cold.summary()
+    assert warm.queries == 0, warm.summary()
+
+def test_poll_tallies(client, poll_ids):
+    cold, warm = profile_cold_and_warm(lambda: client.post("/polls/tallies", json={"ids": poll_ids}))
+    assert cold.queries == 1, cold.summary()
+    assert warm.queries == 0, warm.summary()
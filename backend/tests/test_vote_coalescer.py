@@ -0,0 +1,46 @@
+"""vote_update coalescing keeps the newest tally of each poll"""
+import asyncio
+from app.websocket_manager import ConnectionManager
+
+def published_votes(manager: ConnectionManager, monkeypatch):
+    published = []
+    monkeypatch.setattr(manager, "_publish", lambda topics, message, key=None: published.append(message["data"]["votes"]))
+    return published
+
+def test_stale_tally_does_not_replace_a_pending_newer_one(monkeypatch):
+    manager = ConnectionManager(vote_coalesce_ms=10)
+    published = published_votes(manager, monkeypatch)
+
+    async def scenario():
+        manager.vote_coalescer.submit(1, {"option1": 2}, version=2)
+        # Read before the version 2 commit, submitted after it
+        manager.vote_coalescer.submit(1, {"option1": 1}, version=1)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert published == [{"option1": 2}]
+
+def test_stale_tally_after_publish_is_dropped(monkeypatch):
+    manager = ConnectionManager(vote_coalesce_ms=0)
+    published = published_votes(manager, monkeypatch)
+
+    async def scenario():
+        manager.vote_coalescer.submit(1, {"option1": 3}, version=3)
+        manager.vote_coalescer.submit(1, {"option1": 2}, version=2)
+        manager.vote_coalescer.submit(1, {"option1": 4}, version=4)
+        manager.vote_coalescer.submit(2, {"option1": 1}, version=1)
+
+    asyncio.run(scenario())
+    assert published == [{"option1": 3}, {"option1": 4}, {"option1": 1}]
+
+def test_unversioned_tallies_always_replace(monkeypatch):
+    manager = ConnectionManager(vote_coalesce_ms=10)
+    published = published_votes(manager, monkeypatch)
+
+    async def scenario():
+        manager.vote_coalescer.submit(1, {"option1": 5}, version=5)
+        manager.vote_coalescer.submit(1, {"option1": 6})
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert published == [{"option1": 6}]
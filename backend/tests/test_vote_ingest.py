@@ -0,0 +1,90 @@
+"""Write-behind ingestion keeps every acknowledged vote, across failures and shutdown"""
+import asyncio
+from sqlmodel import Session, func, select
+from app import async_crud
+from app.database import engine
+from app.models import Vote
+from app.vote_ingest import PendingVote, VoteIngestor
+
+def stored_votes(poll_id: int) -> int:
+    with Session(engine) as db:
+        return db.exec(select(func.count()).select_from(Vote).where(Vote.poll_id == poll_id)).one()
+
+def submit_votes(ingestor: VoteIngestor, poll_id: int, count: int):
+    for i in range(count):
+        ingestor.submit(PendingVote(poll_id, f"10.0.0.{i}_ua", 1 + i % 2, f"voter{i}"))
+
+def test_stop_mid_collection_stores_every_vote(client, create_poll):
+    poll_id = create_poll()
+    # The window never closes on its own, the votes are still being collected at stop()
+    ingestor = VoteIngestor(mode="write_behind", batch_size=100, batch_ms=60_000)
+
+    async def scenario():
+        await ingestor.start()
+        submit_votes(ingestor, poll_id, 10)
+        await asyncio.sleep(0.05)
+        assert ingestor.queue.qsize() == 0
+        await ingestor.stop()
+
+    client.portal.call(scenario)
+    assert stored_votes(poll_id) == 10
+    assert ingestor.stats()["flushed"] == 10
+    assert ingestor.stats()["lost"] == 0
+
+def test_stop_flushes_queued_votes(client, create_poll):
+    poll_id = create_poll()
+    ingestor = VoteIngestor(mode="write_behind", batch_size=5, batch_ms=0)
+
+    async def scenario():
+        await ingestor.start()
+        submit_votes(ingestor, poll_id, 12)
+        await ingestor.stop()
+
+    client.portal.call(scenario)
+    assert stored_votes(poll_id) == 12
+    assert ingestor.stats()["lost"] == 0
+
+def test_failed_commit_is_retried(client, create_poll, monkeypatch):
+    poll_id = create_poll()
+    ingestor = VoteIngestor(mode="write_behind", batch_size=100, batch_ms=50, retries=2, backoff_ms=1)
+    apply_vote_batch = async_crud.apply_vote_batch
+    failures = [RuntimeError("database is locked")]
+
+    async def flaky(db, rows):
+        if failures:
+            raise failures.pop()
+        return await apply_vote_batch(db, rows)
+
+    monkeypatch.setattr(async_crud, "apply_vote_batch", flaky)
+
+    async def scenario():
+        await ingestor.start()
+        submit_votes(ingestor, poll_id, 3)
+        while ingestor.stats()["flushed"] < 3:
+            await asyncio.sleep(0.01)
+        await ingestor.stop()
+
+    client.portal.call(scenario)
+    assert stored_votes(poll_id) == 3
+    assert ingestor.stats()["retried"] == 1
+    assert ingestor.stats()["lost"] == 0
+
+def test_votes_lost_after_every_retry_fails(client, create_poll, monkeypatch):
+    poll_id = create_poll()
+    ingestor = VoteIngestor(mode="write_behind", batch_size=100, batch_ms=50, retries=1, backoff_ms=1)
+
+    async def failing(db, rows):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(async_crud, "apply_vote_batch", failing)
+
+    async def scenario():
+        await ingestor.start()
+        submit_votes(ingestor, poll_id, 4)
+        while ingestor.stats()["lost"] < 4:
+            await asyncio.sleep(0.01)
+        await ingestor.stop()
+
+    client.portal.call(scenario)
+    assert stored_votes(poll_id) == 0
+    assert ingestor.stats()["retried"] == 1
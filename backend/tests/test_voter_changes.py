@@ -0,0 +1,58 @@
+"""Voter list changes and versions for direct and write-behind votes"""
+from sqlmodel import Session
+from app import crud
+from app.database import engine
+from app.schemas import VoteCreate
+
+def vote(poll_id: int, voter_ip: str, option: int, username: str):
+    with Session(engine) as db:
+        return crud.record_vote(db, poll_id, VoteCreate(option=option, voter_username=username), voter_ip)[1]
+
+def vote_batch(rows):
+    with Session(engine) as db:
+        return crud.apply_vote_batch(db, rows)
+
+def voters(client, poll_id: int) -> dict:
+    return client.get(f"/polls/{poll_id}/voters").json()
+
+def test_direct_revote_under_another_name_is_a_change(client, create_poll):
+    poll_id = create_poll()
+    added = vote(poll_id, "1.1.1.1_ua", 1, "alice")
+    assert added.kind == "added"
+    version = voters(client, poll_id)["version"]
+
+    renamed = vote(poll_id, "1.1.1.1_ua", 1, "alicia")
+    assert renamed.kind == "renamed"
+    assert renamed.version == version + 1
+    assert (renamed.vote_id, renamed.from_option, renamed.to_option) == (added.vote_id, 1, 1)
+
+    listed = voters(client, poll_id)
+    assert listed["version"] == version + 1
+    assert [voter["username"] for voter in listed["option1_voters"]] == ["alicia"]
+    changes = client.get(f"/polls/{poll_id}/voters/changes", params={"since": version}).json()
+    assert [change["kind"] for change in changes["changes"]] == ["renamed"]
+
+def test_direct_identical_revote_is_not_a_change(client, create_poll):
+    poll_id = create_poll()
+    vote(poll_id, "2.2.2.2_ua", 2, "bob")
+    version = voters(client, poll_id)["version"]
+    assert vote(poll_id, "2.2.2.2_ua", 2, "bob") is None
+    assert voters(client, poll_id)["version"] == version
+
+def test_batch_revote_under_another_name_is_a_change(client, create_poll):
+    poll_id = create_poll()
+    tallies, changes = vote_batch([(poll_id, "3.3.3.3_ua", 2, "carol")])
+    version = tallies[poll_id][0]
+    assert [change.kind for change in changes[poll_id]] == ["added"]
+
+    tallies, changes = vote_batch([(poll_id, "3.3.3.3_ua", 2, "caroline"), (poll_id, "4.4.4.4_ua", 2, "dave")])
+    assert [(change.kind, change.username) for change in changes[poll_id]] == [("renamed", "caroline"), ("added", "dave")]
+    assert tallies[poll_id][0] == version + 2
+    assert tallies[poll_id][1].option2 == 2
+
+    listed = voters(client, poll_id)
+    assert listed["version"] == version + 2
+    assert sorted(voter["username"] for voter in listed["option2_voters"]) == ["caroline", "dave"]
+
+    _, changes = vote_batch([(poll_id, "3.3.3.3_ua", 2, "caroline")])
+    assert changes == {}
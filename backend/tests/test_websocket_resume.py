@@ -0,0 +1,64 @@
+"""Session resume, event replay and snapshots after a WebSocket reconnect"""
+import pytest
+from app.websocket_manager import manager
+
+@pytest.fixture(autouse=True)
+def uncoalesced(monkeypatch):
+    # Every vote is its own vote_update, so replays can be counted
+    monkeypatch.setattr(manager.vote_coalescer, "window", 0)
+
+def receive_until(ws, message_type: str) -> dict:
+    while True:
+        message = ws.receive_json()
+        if message["type"] == message_type:
+            return message
+
+def hello(ws, **resume) -> dict:
+    ws.send_json({"action": "hello", "session": None, **resume})
+    return receive_until(ws, "welcome")
+
+def vote(client, poll_id: int, option: int, username: str):
+    assert client.post(f"/polls/{poll_id}/vote", json={"option": option, "voter_username": username}).status_code == 200
+
+def test_reconnect_replays_missed_events(client, create_poll):
+    poll_id = create_poll()
+    topic = f"poll:{poll_id}"
+    with client.websocket_connect("/ws") as ws:
+        welcome = hello(ws)
+        ws.send_json({"action": "subscribe", "topics": [topic]})
+        assert receive_until(ws, "subscribed")["topics"] == [topic]
+        vote(client, poll_id, 1, "resume-a")
+        last = receive_until(ws, "vote_update")
+
+    vote(client, poll_id, 2, "resume-b")
+    vote(client, poll_id, 2, "resume-c")
+
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"action": "hello", "session": welcome["session"], "epoch": welcome["epoch"], "last_seq": last["seq"]})
+        resumed = receive_until(ws, "welcome")
+        assert resumed["resumed"] is True
+        assert topic in resumed["topics"]
+        replayed = [ws.receive_json(), ws.receive_json()]
+        assert [message["type"] for message in replayed] == ["vote_update", "vote_update"]
+        assert replayed[0]["seq"] < replayed[1]["seq"]
+        assert replayed[0]["seq"] > last["seq"]
+        assert replayed[1]["topic_seq"][topic] == last["topic_seq"][topic] + 2
+        assert replayed[1]["data"]["votes"]["option2"] == 2
+
+def test_unknown_epoch_gets_a_snapshot(client, create_poll):
+    poll_id = create_poll()
+    topic = f"poll:{poll_id}"
+    vote(client, poll_id, 1, "snapshot-a")
+    with client.websocket_connect("/ws") as ws:
+        hello(ws)
+        ws.send_json({"action": "subscribe", "topics": [topic], "epoch": "restarted", "last_seq": 1})
+        snapshot = receive_until(ws, "snapshot")
+        assert snapshot["topic"] == topic
+        assert snapshot["data"]["votes"]["option1"] == 1
+        assert snapshot["topic_seq"][topic] >= 1
+
+def test_unknown_session_starts_fresh(client):
+    with client.websocket_connect("/ws") as ws:
+        welcome = hello(ws, session="no-such-session")
+        assert welcome["resumed"] is False
+        assert welcome["session"] != "no-such-session"
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useRouter, useParams } from 'next/navigation';
 import { Button } from '@/components/ui/button';
 import { PollCard } from '@/components/PollCard';
@@ -25,6 +25,7 @@ export default function UserPage() {
 
   // WebSocket connection
   const { isConnected } = useWebSocket(`${WS_BASE_URL}/ws`, {
+    topics: ['feed', `user:${username}`, ...polls.map(poll => `poll:${poll.id}`)],
     onMessage: (message) => {
       console.log('WebSocket message received:', message);
       
@@ -53,6 +54,22 @@ export default function UserPage() {
         console.log('Processing poll deleted event for poll:', message.poll_id);
         // Remove the deleted poll from the list
         setPolls(prevPolls => prevPolls.filter(poll => poll.id !== message.poll_id));
+      } else if (message.type === 'snapshot') {
+        // Sent after a reconnect when the missed events are no longer buffered
+        if (message.topic?.startsWith('poll:') && message.data) {
+          setPolls(prevPolls =>
+            prevPolls.map(poll =>
+              poll.id === message.data.id
+                ? { ...poll, votes: message.data.votes }
+                : poll
+            )
+          );
+        } else if (message.topic?.startsWith('poll:')) {
+          // No snapshot data for this poll, only its counts need refreshing
+          refreshTallies([Number(message.topic.slice('poll:'.length))]);
+        } else if (message.topic === 'feed') {
+          fetchPolls();
+        }
       }
     },
     onOpen: () => {
@@ -79,6 +96,40 @@ export default function UserPage() {
     }
   };
 
+  // Poll IDs waiting for fresh counts, fetched together in one request
+  const staleTallies = useRef<Set<number>>(new Set());
+
+  const refreshTallies = (ids: number[]) => {
+    const pending = staleTallies.current;
+    const idle = pending.size === 0;
+    ids.forEach(id => pending.add(id));
+    if (!idle) {
+      return;
+    }
+    setTimeout(async () => {
+      const batch = Array.from(pending);
+      pending.clear();
+      try {
+        const { tallies, missing } = await apiClient.getPollTallies(batch);
+        setPolls(prevPolls =>
+          prevPolls
+            .filter(poll => !missing.includes(poll.id))
+            .map(poll => {
+              const tally = tallies[poll.id];
+              if (!tally) {
+                return poll;
+              }
+              const [, option1, option2, option3, option4] = tally;
+              return { ...poll, votes: { option1, option2, option3, option4 } };
+            })
+        );
+      } catch (err) {
+        console.error('Error refreshing poll tallies:', err);
+        fetchPolls();
+      }
+    }, 0);
+  };
+
   useEffect(() => {
     fetchPolls();
   }, []);
@@ -15,6 +15,17 @@ async function proxyRequest(request: NextRequest, path: string) {
     headers['Content-Type'] = contentType;
   }
 
+  // Votes are keyed and rate-limited by client IP and User-Agent, pass the browser's on
+  // (the backend only trusts X-Forwarded-For from the IPs in its FORWARDED_ALLOW_IPS)
+  const clientIp = request.headers.get('x-forwarded-for') || request.headers.get('x-real-ip');
+  if (clientIp) {
+    headers['X-Forwarded-For'] = clientIp;
+  }
+  const userAgent = request.headers.get('user-agent');
+  if (userAgent) {
+    headers['User-Agent'] = userAgent;
+  }
+
   const options: RequestInit = {
     method: request.method,
     headers,
@@ -18,6 +18,12 @@ async function proxyRequest(request: NextRequest, path: string) {
     headers['Content-Type'] = contentType;
   }
 
+  // Lets the backend answer an unchanged poll or list with 304
+  const ifNoneMatch = request.headers.get('if-none-match');
+  if (ifNoneMatch) {
+    headers['If-None-Match'] = ifNoneMatch;
+  }
+
   const options: RequestInit = {
     method: request.method,
     headers,
@@ -37,6 +43,17 @@ async function proxyRequest(request: NextRequest, path: string) {
 
   try {
     const response = await fetch(backendUrl, options);
+    // The browser keeps the body and revalidates it with the ETag
+    const cacheHeaders: Record<string, string> = {};
+    for (const name of ['etag', 'cache-control']) {
+      const value = response.headers.get(name);
+      if (value) {
+        cacheHeaders[name] = value;
+      }
+    }
+    if (response.status === 304) {
+      return new NextResponse(null, { status: 304, headers: cacheHeaders });
+    }
     const data = await response.text();
     
     return new NextResponse(data, {
@@ -44,6 +61,7 @@ async function proxyRequest(request: NextRequest, path: string) {
       statusText: response.statusText,
       headers: {
         'Content-Type': response.headers.get('content-type') || 'application/json',
+        ...cacheHeaders,
       },
     });
   } catch (error) {
@@ -1,12 +1,30 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Heart, User, Clock } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
-import { apiClient, PollVotersResponse, VoterInfo, WS_BASE_URL } from '@/lib/api';
+import { apiClient, PollVotersResponse, VoterChange, VoterInfo, WS_BASE_URL } from '@/lib/api';
 import { useWebSocket } from '@/lib/websocket';
 
+const VOTER_LISTS = ['option1_voters', 'option2_voters', 'option3_voters', 'option4_voters'] as const;
+
+// Apply voter changes in order; replaying a change the list already has is harmless
+function applyVoterChanges(voters: PollVotersResponse, changes: VoterChange[]): PollVotersResponse {
+  const next = { ...voters };
+  for (const change of changes) {
+    if (change.kind === 'reset') {
+      VOTER_LISTS.forEach(list => { next[list] = []; });
+    } else if (change.kind === 'added' || change.kind === 'moved' || change.kind === 'renamed') {
+      VOTER_LISTS.forEach(list => { next[list] = next[list].filter(voter => voter.id !== change.vote_id); });
+      const list = VOTER_LISTS[(change.to_option ?? 1) - 1];
+      next[list] = [...next[list], { id: change.vote_id, username: change.username, voted_at: change.voted_at! }];
+    }
+    next.version = change.version;
+  }
+  return next;
+}
+
 interface VotersListProps {
   pollId: number;
   currentUsername?: string;
@@ -19,9 +37,15 @@ export function VotersList({ pollId, currentUsername, pollCreator, onLikeUser }:
   const [isLoading, setIsLoading] = useState(true);
   const [likingUsers, setLikingUsers] = useState<Set<string>>(new Set());
   const [likedUsers, setLikedUsers] = useState<Set<string>>(new Set());
+  // Version of the list on screen, null until the first fetch lands
+  const versionRef = useRef<number | null>(null);
+  // Deltas that arrive while the full list is loading
+  const pendingChanges = useRef<VoterChange[]>([]);
+  const catchingUp = useRef(false);
 
       // WebSocket connection for real-time updates
       useWebSocket(`${WS_BASE_URL}/ws`, {
+        topics: [`poll:${pollId}`, `voters:${pollId}`],
         onMessage: (message) => {
           if (message.type === 'like_toggle_update' && message.poll_id === pollId) {
             console.log('Received like toggle update for poll:', pollId, message.data);
@@ -36,12 +60,15 @@ export function VotersList({ pollId, currentUsername, pollCreator, onLikeUser }:
               }
               return newSet;
             });
-          } else if (message.type === 'vote_update' && message.poll_id === pollId) {
-            console.log('Received vote update for poll:', pollId, 'refreshing voters list');
-            // Refresh voters list when votes change
-            fetchVoters();
+          } else if (message.type === 'voters_delta' && message.poll_id === pollId) {
+            receiveChanges(message.data.changes);
+          } else if (message.type === 'snapshot' && message.topic === `voters:${pollId}`) {
+            // Deltas fell out of the server's replay buffer
+            catchUp();
           }
-        }
+        },
+        // Deltas sent while disconnected are fetched on reconnect
+        onOpen: () => catchUp()
       });
 
   useEffect(() => {
@@ -52,10 +79,15 @@ export function VotersList({ pollId, currentUsername, pollCreator, onLikeUser }:
   }, [pollId, pollCreator]);
 
   const fetchVoters = async () => {
+    versionRef.current = null;
     try {
       setIsLoading(true);
       const votersData = await apiClient.getPollVoters(pollId);
+      versionRef.current = votersData.version;
       setVoters(votersData);
+      const buffered = pendingChanges.current;
+      pendingChanges.current = [];
+      receiveChanges(buffered);
     } catch (err) {
       console.error('Error fetching voters:', err);
     } finally {
@@ -63,6 +95,45 @@ export function VotersList({ pollId, currentUsername, pollCreator, onLikeUser }:
     }
   };
 
+  const receiveChanges = (changes: VoterChange[]) => {
+    if (versionRef.current === null) {
+      pendingChanges.current.push(...changes);
+      return;
+    }
+    const fresh = changes.filter(change => change.version > versionRef.current!);
+    if (fresh.length === 0) {
+      return;
+    }
+    if (fresh[0].version !== versionRef.current + 1) {
+      // Missed a delta, fetch the ones in between
+      catchUp();
+      return;
+    }
+    if (fresh.some(change => change.kind === 'resync')) {
+      fetchVoters();
+      return;
+    }
+    versionRef.current = fresh[fresh.length - 1].version;
+    setVoters(prev => prev && applyVoterChanges(prev, fresh));
+  };
+
+  const catchUp = async () => {
+    if (versionRef.current === null || catchingUp.current) return;
+    catchingUp.current = true;
+    try {
+      const result = await apiClient.getVoterChanges(pollId, versionRef.current);
+      if (result.resync) {
+        await fetchVoters();
+      } else {
+        receiveChanges(result.changes);
+      }
+    } catch (err) {
+      console.error('Error catching up on voter changes:', err);
+    } finally {
+      catchingUp.current = false;
+    }
+  };
+
   const fetchCreatorLikes = async () => {
     if (!pollCreator) return;
     
@@ -124,7 +195,7 @@ export function VotersList({ pollId, currentUsername, pollCreator, onLikeUser }:
     return (
       <div className="space-y-2">
         {voters.map((voter, index) => (
-          <div key={index} className="flex items-center justify-between p-3 bg-gray-50/80 rounded-xl border border-gray-200/50 hover:bg-gray-100/80 transition-all duration-200">
+          <div key={voter.id ?? index} className="flex items-center justify-between p-3 bg-gray-50/80 rounded-xl border border-gray-200/50 hover:bg-gray-100/80 transition-all duration-200">
             <div className="flex items-center space-x-3">
               <div className="w-8 h-8 bg-gradient-to-br from-blue-500 to-purple-600 rounded-full flex items-center justify-center">
                 <User className="h-4 w-4 text-white" />
@@ -48,8 +48,19 @@ export interface LikeResponse {
 }
 
 export interface WebSocketMessage {
-  type: 'vote_update' | 'like_update' | 'poll_created' | 'poll_deleted' | 'user_like_update' | 'like_toggle_update';
+  type: 'vote_update' | 'voters_delta' | 'like_update' | 'poll_created' | 'poll_deleted' | 'user_like_update' | 'like_toggle_update' | 'snapshot' | 'welcome' | 'ping' | 'subscribed' | 'error';
   poll_id: number;
+  // Topics the event was published to, used to route it to components
+  topics?: string[];
+  // Session ID sent with 'welcome'
+  session?: string;
+  // Position in the server's event stream, a new epoch means the server restarted
+  epoch?: string;
+  seq?: number;
+  // Events published so far to each of the event's topics, a jump means frames were dropped or merged
+  topic_seq?: Record<string, number>;
+  // Topic whose current state a 'snapshot' carries, data is null when the client should refetch
+  topic?: string;
   data: any;
 }
 
@@ -110,6 +121,14 @@ export class ApiClient {
     return this.request<Poll>(`/polls/${id}`);
   }
 
+  // Fresh counts for many poll cards in one request
+  async getPollTallies(ids: number[]): Promise<PollTalliesResponse> {
+    return this.request<PollTalliesResponse>('/polls/tallies', {
+      method: 'POST',
+      body: JSON.stringify({ ids }),
+    });
+  }
+
   async deletePoll(id: number): Promise<{ message: string }> {
     return this.request<{ message: string }>(`/polls/${id}`, {
       method: 'DELETE',
@@ -160,6 +179,10 @@ export class ApiClient {
   async getPollVoters(pollId: number): Promise<PollVotersResponse> {
     return this.request<PollVotersResponse>(`/polls/${pollId}/voters`);
   }
+
+  async getVoterChanges(pollId: number, since: number): Promise<VoterChangesResponse> {
+    return this.request<VoterChangesResponse>(`/polls/${pollId}/voters/changes?since=${since}`);
+  }
 }
 
 export interface UserLikeRequest {
@@ -182,17 +205,42 @@ export interface UserProfile {
 }
 
 export interface VoterInfo {
+  id?: number;
   username?: string;
   voted_at: string;
 }
 
 export interface PollVotersResponse {
   poll_id: number;
+  version: number;
   option1_voters: VoterInfo[];
   option2_voters: VoterInfo[];
   option3_voters: VoterInfo[];
   option4_voters: VoterInfo[];
 }
 
+export interface VoterChange {
+  version: number;
+  kind: 'added' | 'moved' | 'renamed' | 'reset' | 'resync';
+  vote_id?: number;
+  username?: string;
+  from_option?: number;
+  to_option?: number;
+  voted_at?: string;
+}
+
+export interface VoterChangesResponse {
+  poll_id: number;
+  version: number;
+  resync: boolean;
+  changes: VoterChange[];
+}
+
+export interface PollTalliesResponse {
+  // Poll ID -> [version, option1, option2, option3, option4]
+  tallies: Record<string, [number, number, number, number, number]>;
+  missing: number[];
+}
+
 export const apiClient = new ApiClient();
 export { API_BASE_URL, WS_BASE_URL };
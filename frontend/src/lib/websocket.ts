@@ -6,83 +6,397 @@ export interface UseWebSocketOptions {
   onError?: (error: Event) => void;
   onOpen?: () => void;
   onClose?: () => void;
+  // Topics to subscribe to, e.g. 'feed', 'poll:1', 'user:alice'.
+  // Without topics the component receives every update.
+  topics?: string[];
 }
 
-export function useWebSocket(url: string, options: UseWebSocketOptions = {}) {
-  const [isConnected, setIsConnected] = useState(false);
-  const [error, setError] = useState<Event | null>(null);
-  const ws = useRef<WebSocket | null>(null);
-  const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null);
-  const reconnectAttempts = useRef(0);
-  const maxReconnectAttempts = 5;
+interface Subscriber {
+  topics: string[];
+  options: { current: UseWebSocketOptions };
+  setConnected: (connected: boolean) => void;
+  setError: (error: Event | null) => void;
+}
 
-  const connect = () => {
+const ALL_TOPICS = '*';
+const SESSION_KEY = 'ws-session';
+// 'binary' receives vote updates as 29-byte frames instead of JSON
+const WS_ENCODING = process.env.NEXT_PUBLIC_WS_ENCODING || 'json';
+const BINARY_VOTE_UPDATE = 1;
+
+// Decode a binary frame: type, poll_id, seq, option1..option4, topic_seq as big-endian uint8/uint32
+function decodeBinaryMessage(buffer: ArrayBuffer): WebSocketMessage | null {
+  const view = new DataView(buffer);
+  if (view.byteLength < 25 || view.getUint8(0) !== BINARY_VOTE_UPDATE) {
+    return null;
+  }
+  const pollId = view.getUint32(1);
+  const topic = `poll:${pollId}`;
+  return {
+    type: 'vote_update',
+    poll_id: pollId,
+    topics: [topic],
+    seq: view.getUint32(5),
+    topic_seq: view.byteLength >= 29 ? { [topic]: view.getUint32(25) } : undefined,
+    data: {
+      votes: {
+        option1: view.getUint32(9),
+        option2: view.getUint32(13),
+        option3: view.getUint32(17),
+        option4: view.getUint32(21),
+      },
+    },
+  };
+}
+
+const maxReconnectAttempts = 5;
+// Keep an unused socket open briefly so remounts and page changes reuse it
+const IDLE_CLOSE_MS = 1000;
+
+// One socket per URL, shared by every component in the tab. Topics are
+// reference counted: the server hears about a topic when the first
+// component wants it and when the last one lets it go.
+class SharedSocket {
+  private ws: WebSocket | null = null;
+  // Set once the server has welcomed the session
+  private ready = false;
+  private subscribers = new Set<Subscriber>();
+  private topicCounts = new Map<string, number>();
+  private reconnectTimeout: ReturnType<typeof setTimeout> | null = null;
+  private idleTimeout: ReturnType<typeof setTimeout> | null = null;
+  private reconnectAttempts = 0;
+  // Position in the server's event stream, sent on reconnect to replay what was missed
+  private epoch: string | null = null;
+  private lastSeq: number | null = null;
+  // Last topic_seq routed per topic, with the stream seq of that event
+  private topicPositions = new Map<string, { topicSeq: number; seq: number }>();
+  // Topics waiting for the server to replay a gap
+  private catchingUp = new Set<string>();
+
+  constructor(private url: string) {}
+
+  add(subscriber: Subscriber) {
+    if (this.idleTimeout) {
+      clearTimeout(this.idleTimeout);
+      this.idleTimeout = null;
+    }
+    this.subscribers.add(subscriber);
+    this.retain(subscriber.topics);
+    if (!this.ws && !this.reconnectTimeout) {
+      this.connect();
+    } else if (this.ready) {
+      subscriber.setConnected(true);
+      subscriber.options.current.onOpen?.();
+    }
+  }
+
+  remove(subscriber: Subscriber) {
+    if (!this.subscribers.delete(subscriber)) {
+      return;
+    }
+    this.release(subscriber.topics);
+    if (this.subscribers.size === 0) {
+      this.idleTimeout = setTimeout(() => this.close(), IDLE_CLOSE_MS);
+    }
+  }
+
+  setTopics(subscriber: Subscriber, topics: string[]) {
+    const previous = subscriber.topics;
+    subscriber.topics = topics;
+    this.retain(topics);
+    this.release(previous);
+  }
+
+  send(message: any) {
+    if (this.ready && this.ws && this.ws.readyState === WebSocket.OPEN) {
+      this.ws.send(JSON.stringify(message));
+    }
+  }
+
+  private retain(topics: string[]) {
+    const added: string[] = [];
+    for (const topic of topics) {
+      const count = this.topicCounts.get(topic) ?? 0;
+      this.topicCounts.set(topic, count + 1);
+      if (count === 0) {
+        added.push(topic);
+      }
+    }
+    if (added.length > 0) {
+      this.send({ action: 'subscribe', topics: added });
+    }
+  }
+
+  private release(topics: string[]) {
+    const removed: string[] = [];
+    for (const topic of topics) {
+      const count = this.topicCounts.get(topic) ?? 0;
+      if (count <= 1) {
+        this.topicCounts.delete(topic);
+        removed.push(topic);
+      } else {
+        this.topicCounts.set(topic, count - 1);
+      }
+    }
+    if (removed.length > 0) {
+      this.send({ action: 'unsubscribe', topics: removed });
+    }
+  }
+
+  // Bring the server's subscriptions in line with what the components want
+  private reconcile(serverTopics: string[], resumeFrom: { epoch: string; last_seq: number } | null) {
+    const server = new Set(serverTopics);
+    const added = [...this.topicCounts.keys()].filter(topic => !server.has(topic));
+    const removed = serverTopics.filter(topic => !this.topicCounts.has(topic));
+    if (added.length > 0) {
+      this.send({ action: 'subscribe', topics: added, ...resumeFrom });
+    }
+    if (removed.length > 0 && this.topicCounts.size > 0) {
+      this.send({ action: 'unsubscribe', topics: removed });
+    }
+  }
+
+  private connect() {
     try {
-      ws.current = new WebSocket(url);
-      
-      ws.current.onopen = () => {
-        setIsConnected(true);
-        setError(null);
-        reconnectAttempts.current = 0;
-        options.onOpen?.();
+      const ws = new WebSocket(this.url);
+      ws.binaryType = 'arraybuffer';
+      this.ws = ws;
+      this.ready = false;
+
+      ws.onopen = () => {
+        this.reconnectAttempts = 0;
+        // Resume the previous session so the server restores its subscriptions
+        // and replays the events sent while this tab was away
+        ws.send(JSON.stringify({
+          action: 'hello',
+          session: sessionStorage.getItem(SESSION_KEY),
+          encoding: WS_ENCODING,
+          ...this.resumeFrom(),
+        }));
       };
 
-      ws.current.onmessage = (event) => {
+      ws.onmessage = (event) => {
         try {
+          if (event.data instanceof ArrayBuffer) {
+            const decoded = decodeBinaryMessage(event.data);
+            if (decoded) {
+              this.route(decoded);
+            }
+            return;
+          }
           const message: WebSocketMessage = JSON.parse(event.data);
-          options.onMessage?.(message);
+          if (message.type === 'ping') {
+            // The server reaps connections that stop answering
+            ws.send(JSON.stringify({ action: 'pong' }));
+            return;
+          }
+          if (message.type === 'welcome') {
+            sessionStorage.setItem(SESSION_KEY, message.session!);
+            this.ready = true;
+            this.reconcile(message.topics ?? [], this.resumeFrom());
+            if (message.epoch !== this.epoch || this.lastSeq === null) {
+              // A new stream: missed topics arrive as snapshots numbered from here
+              this.epoch = message.epoch ?? null;
+              this.lastSeq = message.seq ?? 0;
+              this.topicPositions.clear();
+            }
+            // Requests sent on the old socket went unanswered, gaps are asked for again
+            this.catchingUp.clear();
+            this.subscribers.forEach(subscriber => {
+              subscriber.setConnected(true);
+              subscriber.setError(null);
+              subscriber.options.current.onOpen?.();
+            });
+            return;
+          }
+          if (message.type === 'subscribed' || message.type === 'error') {
+            return;
+          }
+          this.route(message);
         } catch (err) {
           console.error('Failed to parse WebSocket message:', err);
         }
       };
 
-      ws.current.onclose = () => {
-        setIsConnected(false);
-        options.onClose?.();
-        
-        // Attempt to reconnect
-        if (reconnectAttempts.current < maxReconnectAttempts) {
-          reconnectAttempts.current++;
-          const delay = Math.min(1000 * Math.pow(2, reconnectAttempts.current), 10000);
-          reconnectTimeoutRef.current = setTimeout(connect, delay);
+      ws.onclose = () => {
+        this.ws = null;
+        this.ready = false;
+        this.subscribers.forEach(subscriber => {
+          subscriber.setConnected(false);
+          subscriber.options.current.onClose?.();
+        });
+
+        // Attempt to reconnect while components still need the socket
+        if (this.subscribers.size > 0 && this.reconnectAttempts < maxReconnectAttempts) {
+          this.reconnectAttempts++;
+          const delay = Math.min(1000 * Math.pow(2, this.reconnectAttempts), 10000);
+          this.reconnectTimeout = setTimeout(() => {
+            this.reconnectTimeout = null;
+            this.connect();
+          }, delay);
         }
       };
 
-      ws.current.onerror = (event) => {
-        setError(event);
-        options.onError?.(event);
+      ws.onerror = (event) => {
+        this.subscribers.forEach(subscriber => {
+          subscriber.setError(event);
+          subscriber.options.current.onError?.(event);
+        });
       };
     } catch (err) {
       console.error('Failed to create WebSocket connection:', err);
-      setError(err as Event);
+      this.subscribers.forEach(subscriber => subscriber.setError(err as Event));
+    }
+  }
+
+  private close() {
+    this.idleTimeout = null;
+    if (this.reconnectTimeout) {
+      clearTimeout(this.reconnectTimeout);
+      this.reconnectTimeout = null;
+    }
+    if (this.ws) {
+      this.ws.onclose = null;
+      this.ws.close();
+      this.ws = null;
+    }
+    this.ready = false;
+    this.reconnectAttempts = 0;
+  }
+
+  private resumeFrom() {
+    return this.epoch !== null && this.lastSeq !== null
+      ? { epoch: this.epoch, last_seq: this.lastSeq }
+      : null;
+  }
+
+  // Follow each topic's own numbering. Returns false for events already
+  // routed and for events after a gap, which the server is asked to replay.
+  private inOrder(message: WebSocketMessage): boolean {
+    const topicSeqs = Object.entries(message.topic_seq ?? {});
+    if (message.type === 'snapshot') {
+      for (const [topic, topicSeq] of topicSeqs) {
+        this.topicPositions.set(topic, { topicSeq, seq: message.seq ?? 0 });
+        this.catchingUp.delete(topic);
+      }
+      return true;
+    }
+    if (topicSeqs.length === 0) {
+      return true;
+    }
+    let fresh = false;
+    const gaps: string[] = [];
+    for (const [topic, topicSeq] of topicSeqs) {
+      const last = this.topicPositions.get(topic);
+      if (last && topicSeq <= last.topicSeq) {
+        continue;
+      }
+      if (last && topicSeq > last.topicSeq + 1) {
+        gaps.push(topic);
+      } else {
+        fresh = true;
+      }
+    }
+    if (gaps.length > 0) {
+      const unrequested = gaps.filter(topic => !this.catchingUp.has(topic));
+      if (unrequested.length > 0 && this.epoch !== null && this.ready) {
+        // Replays every event after the last one routed, including this one
+        const since = Math.min(...unrequested.map(topic => this.topicPositions.get(topic)!.seq));
+        unrequested.forEach(topic => this.catchingUp.add(topic));
+        this.send({ action: 'subscribe', topics: unrequested, epoch: this.epoch, last_seq: since });
+      }
+      return false;
+    }
+    for (const [topic, topicSeq] of topicSeqs) {
+      const last = this.topicPositions.get(topic);
+      if (!last || topicSeq > last.topicSeq) {
+        this.topicPositions.set(topic, { topicSeq, seq: message.seq ?? 0 });
+        this.catchingUp.delete(topic);
+      }
+    }
+    return fresh;
+  }
+
+  // Hand a message to the components subscribed to any of its topics
+  private route(message: WebSocketMessage) {
+    if (!this.inOrder(message)) {
+      return;
+    }
+    if (typeof message.seq === 'number' && message.type !== 'snapshot') {
+      this.lastSeq = Math.max(this.lastSeq ?? 0, message.seq);
+    }
+    this.subscribers.forEach(subscriber => {
+      const wanted = !message.topics
+        || subscriber.topics.includes(ALL_TOPICS)
+        || subscriber.topics.some(topic => message.topics!.includes(topic));
+      if (wanted) {
+        subscriber.options.current.onMessage?.(message);
+      }
+    });
+  }
+}
+
+const sockets = new Map<string, SharedSocket>();
+
+function getSharedSocket(url: string): SharedSocket {
+  let socket = sockets.get(url);
+  if (!socket) {
+    socket = new SharedSocket(url);
+    sockets.set(url, socket);
+  }
+  return socket;
+}
+
+export function useWebSocket(url: string, options: UseWebSocketOptions = {}) {
+  const [isConnected, setIsConnected] = useState(false);
+  const [error, setError] = useState<Event | null>(null);
+  // Callbacks always see the latest props
+  const optionsRef = useRef(options);
+  optionsRef.current = options;
+  const subscriberRef = useRef<Subscriber | null>(null);
+  const topics = options.topics ?? [ALL_TOPICS];
+  const topicsKey = [...topics].sort().join(',');
+
+  const connect = () => {
+    if (subscriberRef.current) {
+      return;
     }
+    const subscriber: Subscriber = {
+      topics,
+      options: optionsRef,
+      setConnected: setIsConnected,
+      setError,
+    };
+    subscriberRef.current = subscriber;
+    getSharedSocket(url).add(subscriber);
   };
 
   const disconnect = () => {
-    if (reconnectTimeoutRef.current) {
-      clearTimeout(reconnectTimeoutRef.current);
-    }
-    if (ws.current) {
-      ws.current.close();
-      ws.current = null;
+    if (subscriberRef.current) {
+      getSharedSocket(url).remove(subscriberRef.current);
+      subscriberRef.current = null;
     }
     setIsConnected(false);
   };
 
   const sendMessage = (message: any) => {
-    if (ws.current && ws.current.readyState === WebSocket.OPEN) {
-      ws.current.send(JSON.stringify(message));
-    }
+    getSharedSocket(url).send(message);
   };
 
   useEffect(() => {
     connect();
-    
+
     return () => {
       disconnect();
     };
   }, [url]);
 
+  useEffect(() => {
+    if (subscriberRef.current) {
+      getSharedSocket(url).setTopics(subscriberRef.current, topics);
+    }
+  }, [topicsKey]);
+
   return {
     isConnected,
     error,
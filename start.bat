@@ -51,7 +51,7 @@ pip install -r requirements.txt
 
 REM Start backend in background
 echo 🚀 Starting FastAPI server on http://localhost:8000
-start /b uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
+start /b uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 --ws app.ws_protocol:DeflateWebSocketProtocol
 
 REM Wait a moment for backend to start
 timeout /t 3 /nobreak >nul
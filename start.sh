@@ -51,7 +51,7 @@ pip install -r requirements.txt
 
 # Start backend in background
 echo "🚀 Starting FastAPI server on http://localhost:8001"
-uvicorn app.main:app --reload --host 0.0.0.0 --port 8001 &
+uvicorn app.main:app --reload --host 0.0.0.0 --port 8001 --ws app.ws_protocol:DeflateWebSocketProtocol &
 BACKEND_PID=$!
 
 # Wait a moment for backend to start